@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from anyio import from_thread
+from fastapi import HTTPException
+
+# Queue priorities: lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a priority gate's wait queue is full, or a wait takes too long
+    """
+
+    def __init__(self, name: str, retry_after: float, reason: str = "queue is full"):
+        super().__init__(f"{name} {reason}")
+        self.retry_after = retry_after
+
+
+def too_many_requests(retry_after: float, detail: str = "请求过于频繁，请稍后再试") -> HTTPException:
+    """
+    Build a 429 response with a Retry-After header
+    """
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at `rate` tokens per second up to `capacity`
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self, cost: float) -> float:
+        """
+        Take `cost` tokens; returns 0 on success, otherwise seconds until they are available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        # A request larger than the bucket needs a full bucket rather than never passing
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by user, for one route
+
+    Only the most recently active `max_keys` users are tracked; an evicted
+    user simply starts again with a full bucket.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float, max_keys: int = 10000):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, key: str, cost: float = 1) -> None:
+        """
+        Charge the request to the user's bucket, raising 429 when it is empty
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        retry_after = bucket.try_acquire(cost)
+        if retry_after > 0:
+            self.rejected += 1
+            raise too_many_requests(retry_after)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.capacity,
+            "tracked_users": len(self._buckets),
+            "rejected": self.rejected,
+        }
+
+
+class PriorityGate:
+    """
+    Bounded priority queue in front of an expensive backend call
+
+    At most `max_concurrency` callers hold a slot at once; others wait in
+    priority order (interactive before bulk, FIFO within a priority). When
+    `max_queue` callers are already waiting, new ones are rejected at once,
+    and a caller still waiting after `max_wait` seconds gives up.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        retry_after: float = 1.0,
+        max_wait: Optional[float] = None
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.max_wait = max_wait
+        self.active = 0
+        self.rejected = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def _queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int) -> None:
+        if self.active < self.max_concurrency and not self._queued():
+            self.active += 1
+            return
+        if self._queued() >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.name, self.retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            # Keep the slot if it was handed over just as the wait ran out
+            if future.cancel():
+                self.rejected += 1
+                raise QueueFullError(self.name, self.retry_after, "queue wait timed out")
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if not future.cancel():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        # Hand the slot straight to the next live waiter
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @contextmanager
+    def thread_slot(self, priority: int = PRIORITY_INTERACTIVE):
+        """
+        slot() for blocking code running in a worker thread of the event loop
+        """
+        from_thread.run(self.acquire, priority)
+        try:
+            yield
+        finally:
+            from_thread.run_sync(self.release)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self._queued(),
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class HotAudioCache:
+    """
+    Size-bounded in-memory tier in front of the on-disk audio cache
+
+    Clips are kept base64-encoded, ready to send, and evicted least
+    recently used first once max_bytes is exceeded. Also counts hits for
+    both tiers so their hit ratios can be reported.
+
+    Each process has its own tier. invalidate() bumps the mtime of a
+    marker file shared by all processes; every tier checks the marker at
+    most once per check_interval and drops its clips when it changed.
+    """
+
+    def __init__(self, max_bytes: int, generation_path: Optional[Path] = None, check_interval: float = 1.0):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._clips: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.generation_path = generation_path
+        self.check_interval = check_interval
+        # Read on first lookup, so creating the cache touches no files
+        self._generation: Optional[int] = None
+        self._checked_at = float("-inf")
+
+    def _read_generation(self) -> int:
+        if self.generation_path is None:
+            return 0
+        try:
+            return self.generation_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _sync_generation(self) -> None:
+        """
+        Drop every clip if another process invalidated the cache since the last check
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        generation = self._read_generation()
+        if self._generation is not None and generation != self._generation:
+            self._clips.clear()
+            self.size_bytes = 0
+        self._generation = generation
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._sync_generation()
+            clip = self._clips.get(key)
+            if clip is not None:
+                self._clips.move_to_end(key)
+                self.memory_hits += 1
+            return clip
+
+    def put(self, key: str, clip: str) -> None:
+        if len(clip) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._clips.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous)
+            self._clips[key] = clip
+            self.size_bytes += len(clip)
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._clips.popitem(last=False)
+                self.size_bytes -= len(evicted)
+
+    def record_disk_hit(self) -> None:
+        with self._lock:
+            self.disk_hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def invalidate(self) -> None:
+        """
+        Clear this process's clips and signal other processes to clear theirs
+        """
+        with self._lock:
+            self._clips.clear()
+            self.size_bytes = 0
+            if self.generation_path is not None:
+                self.generation_path.parent.mkdir(parents=True, exist_ok=True)
+                self.generation_path.touch()
+                self._generation = self._read_generation()
+                self._checked_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_lookups = self.disk_hits + self.misses
+            return {
+                "memory_clips": len(self._clips),
+                "memory_size_bytes": self.size_bytes,
+                "memory_max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_hit_ratio": round(self.memory_hits / lookups, 4) if lookups else None,
+                "disk_hit_ratio": round(self.disk_hits / disk_lookups, 4) if disk_lookups else None,
+                "overall_hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,168 @@
+import csv
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Index file layout:
+#   header   MAGIC, entry count
+#   table    one fixed-size record per word, sorted by key:
+#            key offset, key length, value offset, value length
+#   blob     utf-8 keys and compact JSON values
+# Fixed-size records allow binary search directly on the memory-mapped file,
+# so lookups never copy the dictionary onto the per-process heap.
+MAGIC = b"EWDICT1\0"
+HEADER = struct.Struct("<8sI")
+RECORD = struct.Struct("<IHII")
+
+
+def normalize_word(word: str) -> str:
+    """
+    Normalize a word for dictionary lookup
+    """
+    return word.strip().lower()
+
+
+def _parse_examples(row: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Read examples from a CSV row, either as a JSON column or as
+    example_en_N / example_zh_N column pairs
+    """
+    if row.get("examples"):
+        return [{"en": e.get("en", ""), "zh": e.get("zh", "")} for e in json.loads(row["examples"])]
+    examples = []
+    n = 1
+    while f"example_en_{n}" in row:
+        if row[f"example_en_{n}"]:
+            examples.append({"en": row[f"example_en_{n}"], "zh": row.get(f"example_zh_{n}") or ""})
+        n += 1
+    return examples
+
+
+def read_vocabulary(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Read vocabulary entries from a CSV or JSONL file
+
+    Each entry needs word, phonetic, meaning and examples ([{en, zh}]).
+    """
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                yield {
+                    "word": row.get("word", ""),
+                    "phonetic": row.get("phonetic", ""),
+                    "meaning": row.get("meaning", ""),
+                    "examples": _parse_examples(row),
+                }
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def build_index(entries: Iterable[Dict[str, Any]], output_path: Path) -> int:
+    """
+    Write entries to a dictionary index file and return the number of words
+
+    The file is written to a temporary path and renamed into place, so
+    running workers never map a half-written index.
+    """
+    values: Dict[str, bytes] = {}
+    for entry in entries:
+        key = normalize_word(entry.get("word", ""))
+        if not key:
+            continue
+        values[key] = json.dumps(
+            {
+                "phonetic": entry.get("phonetic", ""),
+                "meaning": entry.get("meaning", ""),
+                "examples": entry.get("examples", []),
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    keys = sorted(values, key=lambda k: k.encode("utf-8"))
+    blob_start = HEADER.size + RECORD.size * len(keys)
+    records = []
+    blob = bytearray()
+    for key in keys:
+        key_bytes = key.encode("utf-8")
+        key_offset = blob_start + len(blob)
+        blob += key_bytes
+        value_offset = blob_start + len(blob)
+        blob += values[key]
+        records.append(RECORD.pack(key_offset, len(key_bytes), value_offset, len(values[key])))
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        f.write(b"".join(records))
+        f.write(blob)
+    os.replace(tmp_path, output_path)
+    return len(keys)
+
+
+class DictionaryIndex:
+    """
+    Read-only, memory-mapped word lookup
+
+    The index pages live in the OS page cache, so every worker process
+    mapping the same file shares a single copy.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a dictionary index: {path}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _record(self, index: int) -> Tuple[int, int, int, int]:
+        return RECORD.unpack_from(self._mm, HEADER.size + index * RECORD.size)
+
+    def lookup(self, word: str) -> Optional[Dict[str, Any]]:
+        """
+        Binary search the index for a word
+        """
+        target = normalize_word(word).encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, key_len, value_offset, value_len = self._record(mid)
+            key = self._mm[key_offset:key_offset + key_len]
+            if key == target:
+                return json.loads(self._mm[value_offset:value_offset + value_len])
+            if key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def open_dictionary(path: Path) -> Optional[DictionaryIndex]:
+    """
+    Map the dictionary index if it exists
+    """
+    if not path.exists():
+        logging.info(f"No dictionary index at {path}, all words will go to Bedrock")
+        return None
+    try:
+        index = DictionaryIndex(path)
+        logging.info(f"Loaded dictionary index with {len(index)} words from {path}")
+        return index
+    except Exception as e:
+        logging.error(f"Error loading dictionary index: {str(e)}")
+        return None
@@ -1,39 +1,208 @@
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, FastAPI, HTTPException, Query, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import boto3
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator, Callable, ContextManager
+from contextlib import ExitStack, asynccontextmanager, contextmanager, nullcontext
+from functools import lru_cache, partial
 import json
 import os
 import base64
 import logging
 import uuid
 import hashlib
+import hmac
+import itertools
+import tempfile
+import threading
+from xml.sax.saxutils import escape
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from email.utils import format_datetime, parsedate_to_datetime
 from dotenv import load_dotenv
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from .admission import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PriorityGate,
+    QueueFullError,
+    RateLimiter,
+    too_many_requests,
+)
+from .audio_cache import HotAudioCache
+from .dictionary import open_dictionary
+from .mp3 import split_mp3
+from .profiling import install_profiling, run_in_threadpool
+from .resilience import ResilientService
+from .search import SearchIndexRegistry
+from .word_store import WordContentStore
 
 # Load environment variables
 load_dotenv()
 
-# Create cache directory if it doesn't exist
+# Deadlines, retries and circuit breakers for the AWS services with a fallback path
+bedrock_service = ResilientService(
+    "bedrock",
+    deadline=float(os.getenv("BEDROCK_DEADLINE_SECONDS", "60")),
+    max_attempts=int(os.getenv("BEDROCK_MAX_ATTEMPTS", "2")),
+)
+polly_service = ResilientService(
+    "polly",
+    deadline=float(os.getenv("POLLY_DEADLINE_SECONDS", "5")),
+    max_attempts=int(os.getenv("POLLY_MAX_ATTEMPTS", "3")),
+)
+
+# Per-user rate limits; /process-words is charged one token per word
+process_words_limiter = RateLimiter(
+    "process-words",
+    rate=float(os.getenv("PROCESS_WORDS_RATE", "1")),
+    capacity=float(os.getenv("PROCESS_WORDS_BURST", "100")),
+)
+speech_limiter = RateLimiter(
+    "generate-speech",
+    rate=float(os.getenv("SPEECH_RATE", "5")),
+    capacity=float(os.getenv("SPEECH_BURST", "40")),
+)
+
+# Bounded priority queues in front of Bedrock and Polly
+bedrock_gate = PriorityGate(
+    "bedrock",
+    max_concurrency=int(os.getenv("BEDROCK_MAX_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("BEDROCK_MAX_QUEUE", "16")),
+    max_wait=float(os.getenv("BEDROCK_MAX_QUEUE_WAIT_SECONDS", "30")),
+)
+polly_gate = PriorityGate(
+    "polly",
+    max_concurrency=int(os.getenv("POLLY_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("POLLY_MAX_QUEUE", "64")),
+    max_wait=float(os.getenv("POLLY_MAX_QUEUE_WAIT_SECONDS", "10")),
+)
+
+# Audio cache directory, created on first write
 CACHE_DIR = Path("audio_cache")
-CACHE_DIR.mkdir(exist_ok=True)
 
-app = FastAPI(title="英语学习 API", description="智能背单词应用的后端 API")
+# Number of lock files shared by all audio cache keys
+AUDIO_LOCK_STRIPES = 256
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# In-memory hot tier in front of CACHE_DIR, holding base64 clips ready to send.
+# Each worker has its own; /clear-cache reaches the others through a marker file.
+hot_audio_cache = HotAudioCache(
+    int(float(os.getenv("AUDIO_MEMORY_CACHE_MB", "64")) * 1024 * 1024),
+    generation_path=CACHE_DIR / ".generation"
 )
 
+# Routes are registered on a router and mounted by create_app()
+router = APIRouter()
+
+# AWS clients and other heavy resources are created on first use (or at
+# startup when WARM_START is set), not when this module is imported.
+# boto3/botocore in particular are only imported when first needed.
+@lru_cache(maxsize=None)
+def get_polly_client():
+    """
+    Get the shared Amazon Polly client (boto3 clients are thread-safe)
+    """
+    import boto3
+    return boto3.client('polly', region_name='us-east-1', config=polly_service.config)
+
+@lru_cache(maxsize=None)
+def get_bedrock_client():
+    """
+    Get the shared Bedrock Runtime client
+    """
+    import boto3
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name='us-east-1',
+        config=bedrock_service.config
+    )
+
+def dynamodb_key(name: str):
+    """
+    DynamoDB key condition builder, imported lazily with boto3
+    """
+    from boto3.dynamodb.conditions import Key
+    return Key(name)
+
+_dictionary_lock = threading.Lock()
+# Identity of the mapped file; the initial value matches no file state
+_dictionary_version: Any = object()
+_dictionary_index = None
+
+def dictionary_file_version(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def get_dictionary_index():
+    """
+    Memory-map the dictionary of known words (built with import_dictionary.py)
+
+    The file is mapped on first use and mapped again whenever it is
+    replaced or first appears, so a re-import takes effect without a
+    restart. The previous mapping is left to the garbage collector, since
+    other threads may still be reading from it.
+    """
+    global _dictionary_version, _dictionary_index
+    path = Path(os.getenv("DICTIONARY_INDEX", "dictionary.idx"))
+    version = dictionary_file_version(path)
+    if version != _dictionary_version:
+        with _dictionary_lock:
+            if version != _dictionary_version:
+                _dictionary_index = open_dictionary(path)
+                _dictionary_version = version
+    return _dictionary_index
+
+def warm_up() -> None:
+    """
+    Create clients and map the dictionary ahead of the first request
+    """
+    get_polly_client()
+    get_bedrock_client()
+    get_dynamodb_client()
+    get_dictionary_index()
+    logging.info("Warm start complete")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("WARM_START", "false").lower() == "true":
+        await run_in_threadpool(warm_up)
+    yield
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application
+
+    Cheap by design: nothing here touches AWS, the file system or boto3.
+    """
+    app = FastAPI(title="英语学习 API", description="智能背单词应用的后端 API", lifespan=lifespan)
+    
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with specific origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Opt-in per-request profiling (no-op unless PROFILE_TOKEN or PROFILE_PATHS is set)
+    install_profiling(app)
+    
+    app.include_router(router)
+    return app
+
 # Models
 class WordInput(BaseModel):
     words: List[str]
+    userId: Optional[str] = None
 
 class Example(BaseModel):
     en: str
@@ -50,6 +219,11 @@ class WordsResponse(BaseModel):
 
 class SpeechRequest(BaseModel):
     text: str
+    userId: Optional[str] = None
+
+class BatchSpeechRequest(BaseModel):
+    texts: List[str]
+    userId: Optional[str] = None
 
 class WordListInput(BaseModel):
     name: str
@@ -112,11 +286,11 @@ MOCK_DATA = {
     }
 }
 
-@app.get("/")
+@router.get("/")
 async def root():
     return {"message": "英语学习 API 正在运行"}
 
-@app.get("/cache-stats")
+@router.get("/cache-stats")
 async def cache_stats():
     """
     Get statistics about the audio cache
@@ -145,13 +319,14 @@ async def cache_stats():
             "total_size_mb": round(total_size / (1024 * 1024), 2),
             "oldest_file_time": oldest_time,
             "newest_file_time": newest_time,
+            "tiers": hot_audio_cache.snapshot(),
             "status": "success"
         }
     except Exception as e:
         logging.error(f"Error getting cache stats: {str(e)}")
         return {"message": f"获取缓存统计信息失败: {str(e)}", "status": "error"}
 
-@app.delete("/clear-cache")
+@router.delete("/clear-cache")
 async def clear_cache():
     """
     Clear the audio cache
@@ -164,6 +339,8 @@ async def clear_cache():
         # Delete all cache files
         for file in cache_files:
             file.unlink()
+        # Other workers drop their in-memory clips within a second
+        hot_audio_cache.invalidate()
         
         logging.info(f"Cleared {file_count} files from cache")
         
@@ -175,7 +352,7 @@ async def clear_cache():
         logging.error(f"Error clearing cache: {str(e)}")
         return {"message": f"清除缓存失败: {str(e)}", "status": "error"}
 
-@app.get("/test-speech")
+@router.get("/test-speech")
 async def test_speech():
     """
     Test endpoint for speech generation
@@ -193,41 +370,100 @@ async def test_speech():
         logging.error(f"Error in test speech endpoint: {str(e)}")
         return {"message": f"测试失败: {str(e)}", "status": "error"}
 
-@app.post("/process-words", response_model=WordsResponse)
-async def process_words(word_input: WordInput):
+@router.get("/service-stats")
+async def service_stats():
+    """
+    Get circuit breaker state and retry counters for Bedrock and Polly
+    """
+    return {
+        "bedrock": bedrock_service.snapshot(),
+        "polly": polly_service.snapshot(),
+        "admission": {
+            "rate_limits": {
+                "process_words": process_words_limiter.snapshot(),
+                "generate_speech": speech_limiter.snapshot()
+            },
+            "queues": {
+                "bedrock": bedrock_gate.snapshot(),
+                "polly": polly_gate.snapshot()
+            }
+        },
+        "status": "success"
+    }
+
+def get_request_user(request: Request, body_user_id: Optional[str] = None) -> str:
+    """
+    Identify the caller for rate limiting: the client address, or for
+    requests relayed by the Next.js API routes, the user id they forward
+
+    Relayed requests all come from the same address, so those routes send
+    the user id (X-User-Id header, or userId in the body or query) along
+    with the shared BACKEND_PROXY_SECRET. Ids from anyone else are ignored;
+    otherwise a caller could get a fresh bucket per request by varying them.
+    """
+    secret = os.getenv("BACKEND_PROXY_SECRET", "")
+    provided = request.headers.get("X-Proxy-Secret", "")
+    if secret and provided and hmac.compare_digest(provided, secret):
+        user_id = request.headers.get("X-User-Id") or body_user_id or request.query_params.get("userId")
+        if user_id:
+            return f"user:{user_id}"
+    return request.client.host if request.client else "anonymous"
+
+@router.post("/process-words", response_model=WordsResponse)
+async def process_words(word_input: WordInput, request: Request):
     """
     Process a list of words using Amazon Bedrock Claude
     """
     if not word_input.words:
         raise HTTPException(status_code=400, detail="请提供至少一个单词")
     
+    # Words in the local dictionary cost nothing and skip the Bedrock queue
+    results = await run_in_threadpool(lookup_dictionary_words, word_input.words)
+    unknown = [index for index in range(len(word_input.words)) if index not in results]
+    
+    if unknown:
+        # Charge the user one token per word sent to Bedrock before doing any work
+        process_words_limiter.check(get_request_user(request, word_input.userId), cost=len(unknown))
+    
+    # Single-word lookups are interactive; longer lists are bulk jobs
+    priority = PRIORITY_INTERACTIVE if len(unknown) == 1 else PRIORITY_BULK
+    
     try:
-        # Call Amazon Bedrock Claude to process the words
-        result = call_bedrock_claude(word_input.words)
+        if unknown:
+            # Call Amazon Bedrock Claude to process the remaining words, queueing per batch
+            result = await run_in_threadpool(
+                call_bedrock_claude,
+                [word_input.words[i] for i in unknown],
+                partial(bedrock_gate.thread_slot, priority)
+            )
+            for index, word_data in zip(unknown, result.get("words", [])):
+                results[index] = word_data
         
         # Convert the result to the expected response model
         processed_words = []
         
-        if "words" in result and isinstance(result["words"], list):
-            for word_data in result["words"]:
-                try:
-                    processed_words.append(
-                        Word(
-                            word=word_data["word"],
-                            phonetic=word_data["phonetic"],
-                            meaning=word_data["meaning"],
-                            examples=word_data["examples"]
-                        )
+        for index in sorted(results):
+            word_data = results[index]
+            try:
+                processed_words.append(
+                    Word(
+                        word=word_data["word"],
+                        phonetic=word_data["phonetic"],
+                        meaning=word_data["meaning"],
+                        examples=word_data["examples"]
                     )
-                except KeyError as e:
-                    logging.error(f"Missing key in word data: {e}")
-                    # Skip this word if it's missing required fields
+                )
+            except KeyError as e:
+                logging.error(f"Missing key in word data: {e}")
+                # Skip this word if it's missing required fields
         
         # If no words were processed successfully, raise an exception
         if not processed_words:
             raise HTTPException(status_code=500, detail="处理单词失败，请稍后再试")
         
         return WordsResponse(words=processed_words)
+    except QueueFullError as e:
+        raise too_many_requests(e.retry_after, "处理单词的请求过多，请稍后再试")
     except Exception as e:
         logging.error(f"Error processing words: {str(e)}")
         raise HTTPException(status_code=500, detail=f"处理单词时出错: {str(e)}")
@@ -240,37 +476,158 @@ def get_audio_cache_path(text: str) -> Path:
     text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
     return CACHE_DIR / f"{text_hash}.mp3"
 
-def get_cached_audio(text: str) -> Optional[str]:
+def read_cached_audio_file(cache_path: Path) -> Optional[str]:
     """
-    Get cached audio for the given text if it exists
+    Read and base64-encode a clip from the disk tier
     """
-    cache_path = get_audio_cache_path(text)
-    if cache_path.exists():
-        logging.info(f"Found cached audio for text: {text}")
+    try:
         with open(cache_path, "rb") as f:
             audio_data = f.read()
-            return base64.b64encode(audio_data).decode('utf-8')
-    return None
+    except FileNotFoundError:
+        return None
+    return base64.b64encode(audio_data).decode('utf-8')
+
+async def get_cached_audio(text: str) -> Optional[str]:
+    """
+    Get cached audio for the given text if it exists
+
+    Checks the in-memory hot tier first, then reads the disk tier off the
+    event loop and promotes the clip into memory.
+    """
+    cache_path = get_audio_cache_path(text)
+    cached_audio = hot_audio_cache.get(cache_path.stem)
+    if cached_audio is not None:
+        return cached_audio
+    
+    cached_audio = await run_in_threadpool(read_cached_audio_file, cache_path)
+    if cached_audio is None:
+        hot_audio_cache.record_miss()
+        return None
+    
+    logging.info(f"Found cached audio for text: {text}")
+    hot_audio_cache.record_disk_hit()
+    hot_audio_cache.put(cache_path.stem, cached_audio)
+    return cached_audio
 
 def save_audio_to_cache(text: str, audio_data: bytes) -> None:
     """
     Save audio data to cache
+
+    The clip is written to a temporary file and renamed into place, so
+    readers in any process see either no file or the complete clip.
     """
     cache_path = get_audio_cache_path(text)
-    with open(cache_path, "wb") as f:
-        f.write(audio_data)
+    CACHE_DIR.mkdir(exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f".{cache_path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
     logging.info(f"Saved audio to cache for text: {text}")
 
-@app.post("/generate-speech")
-async def generate_speech(request: SpeechRequest):
+def audio_lock_stripe(text: str) -> int:
+    """
+    Pick the lock file guarding a cache key
+
+    Keys share a fixed set of lock files, so the lock directory does not
+    grow with the number of cached texts.
+    """
+    return int(get_audio_cache_path(text).stem, 16) % AUDIO_LOCK_STRIPES
+
+@contextmanager
+def audio_stripe_lock(stripe: int, timeout: float):
+    """
+    Cross-process lock for one stripe of cache keys
+    """
+    if fcntl is None:
+        # No flock on this platform; atomic renames still prevent torn reads
+        yield
+        return
+    lock_dir = CACHE_DIR / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    with open(lock_dir / f"{stripe:03d}.lock", "w") as lock_file:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for audio cache lock {stripe}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def audio_cache_lock(text: str, timeout: float):
+    """
+    Cross-process lock for one cache key, so that concurrent misses in
+    different workers make a single Polly call
+    """
+    return audio_stripe_lock(audio_lock_stripe(text), timeout)
+
+def synthesize_speech(text: str) -> bytes:
+    """
+    Generate audio for one text with Amazon Polly and store it in the cache
+
+    Callers must hold the text's audio_cache_lock.
+    """
+    polly_client = get_polly_client()
+    
+    logging.info(f"Calling Amazon Polly with text: {text}")
+    response = polly_service.call(
+        polly_client.synthesize_speech,
+        Engine='neural',  # 使用神经语音引擎获得更自然的语音
+        Text=text,
+        OutputFormat='mp3',
+        VoiceId='Joanna',  # 可以根据需要选择不同的声音
+        LanguageCode='en-US'
+    )
+    logging.info("Amazon Polly API call successful")
+    
+    if "AudioStream" not in response:
+        logging.error("AudioStream not found in Polly response")
+        raise HTTPException(status_code=500, detail="Failed to generate speech")
+    audio_stream = response["AudioStream"].read()
+    
+    # Save to cache
+    save_audio_to_cache(text, audio_stream)
+    return audio_stream
+
+def synthesize_and_cache(text: str) -> Tuple[bytes, bool]:
+    """
+    Generate audio with Amazon Polly and store it in the cache
+
+    Runs under the key's cross-process lock. If another worker filled the
+    cache while we waited, its clip is returned instead of calling Polly.
+    Returns the audio bytes and whether they came from the cache.
+    """
+    with audio_cache_lock(text, timeout=polly_service.deadline):
+        cache_path = get_audio_cache_path(text)
+        try:
+            return cache_path.read_bytes(), True
+        except FileNotFoundError:
+            pass
+        return synthesize_speech(text), False
+
+@router.post("/generate-speech")
+async def generate_speech(request: SpeechRequest, http_request: Request):
     """
     Generate speech from text using Amazon Polly
     """
     logging.info(f"Received speech generation request with text: {request.text}")
     
+    speech_limiter.check(get_request_user(http_request, request.userId))
+    
     try:
         # Check if audio is already cached
-        cached_audio = get_cached_audio(request.text)
+        cached_audio = await get_cached_audio(request.text)
         if cached_audio:
             logging.info("Using cached audio")
             return {
@@ -281,59 +638,213 @@ async def generate_speech(request: SpeechRequest):
             }
         
         # If not cached, generate new audio
-        polly_client = boto3.client('polly', region_name='us-east-1')
-        
-        logging.info(f"Calling Amazon Polly with text: {request.text}")
-        response = polly_client.synthesize_speech(
-            Engine='neural',  # 使用神经语音引擎获得更自然的语音
-            Text=request.text,
-            OutputFormat='mp3',
-            VoiceId='Joanna',  # 可以根据需要选择不同的声音
-            LanguageCode='en-US'
-        )
-        logging.info("Amazon Polly API call successful")
+        async with polly_gate.slot(PRIORITY_INTERACTIVE):
+            audio_stream, cached = await run_in_threadpool(synthesize_and_cache, request.text)
         
         # 返回音频流的base64编码
-        if "AudioStream" in response:
-            audio_stream = response["AudioStream"].read()
-            
-            # Save to cache
-            save_audio_to_cache(request.text, audio_stream)
-            
-            audio_base64 = base64.b64encode(audio_stream).decode('utf-8')
-            logging.info(f"Audio generated successfully, base64 length: {len(audio_base64)}")
-            return {
-                "audio": audio_base64,
-                "format": "mp3",
-                "status": "success",
-                "cached": False
-            }
-        else:
-            logging.error("AudioStream not found in Polly response")
-            raise HTTPException(status_code=500, detail="Failed to generate speech")
+        audio_base64 = base64.b64encode(audio_stream).decode('utf-8')
+        hot_audio_cache.put(get_audio_cache_path(request.text).stem, audio_base64)
+        logging.info(f"Audio generated successfully, base64 length: {len(audio_base64)}")
+        return {
+            "audio": audio_base64,
+            "format": "mp3",
+            "status": "success",
+            "cached": cached
+        }
+    except QueueFullError as e:
+        raise too_many_requests(e.retry_after, "语音生成请求过多，请稍后再试")
     except Exception as e:
         logging.error(f"Error generating speech: {str(e)}")
         # 在开发环境中，返回错误详情
         return {"message": f"语音生成失败: {str(e)}", "status": "error"}
 
-# Function to call Amazon Bedrock Claude
-def call_bedrock_claude(words: List[str]) -> Dict[str, Any]:
+# Batch synthesis settings
+MAX_BATCH_SPEECH_TEXTS = 10
+# Keep each SSML request well under Polly's 3000 billed-character limit
+MAX_SSML_TEXT_CHARS = 2500
+# Pause between texts, so every clip ends in silence rather than mid-word
+SSML_BREAK = '<break time="500ms"/>'
+
+def polly_batch_chunks(texts: List[str]) -> List[List[str]]:
     """
-    Call Amazon Bedrock Claude to process words
+    Group texts into as few SSML requests as the character limit allows
+    """
+    chunks: List[List[str]] = []
+    size = 0
+    for text in texts:
+        if not chunks or size + len(text) > MAX_SSML_TEXT_CHARS:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(text)
+        size += len(text)
+    return chunks
+
+def synthesize_chunk(chunk: List[str]) -> Dict[str, bytes]:
+    """
+    Generate audio for several texts with one SSML rendering and cache each clip
+
+    Each text is preceded by an SSML <mark>. Polly is asked once for the
+    speech marks and once for the audio of the whole document; the MP3 is
+    then cut at the mark times into one clip per text, and every clip is
+    cached under its own text's key. Callers must hold every text's
+    audio_cache_lock.
+    """
+    if len(chunk) == 1:
+        return {chunk[0]: synthesize_speech(chunk[0])}
+    
+    polly_client = get_polly_client()
+    ssml = "<speak>" + SSML_BREAK.join(
+        f'<mark name="{i}"/>{escape(text)}' for i, text in enumerate(chunk)
+    ) + "</speak>"
+    synthesis_args = {
+        'Engine': 'neural',
+        'Text': ssml,
+        'TextType': 'ssml',
+        'VoiceId': 'Joanna',
+        'LanguageCode': 'en-US'
+    }
+    
+    logging.info(f"Calling Amazon Polly for {len(chunk)} texts in one SSML request")
+    marks_response = polly_service.call(
+        polly_client.synthesize_speech,
+        OutputFormat='json',
+        SpeechMarkTypes=['ssml'],
+        **synthesis_args
+    )
+    marks = [json.loads(line) for line in marks_response["AudioStream"].read().splitlines() if line.strip()]
+    offsets = {mark["value"]: mark["time"] for mark in marks if mark.get("type") == "ssml"}
+    
+    if len(offsets) != len(chunk):
+        # Could not locate every text; synthesize them one by one instead
+        logging.warning(f"Expected {len(chunk)} speech marks, got {len(offsets)}")
+        return {text: synthesize_speech(text) for text in chunk}
+    
+    audio_response = polly_service.call(polly_client.synthesize_speech, OutputFormat='mp3', **synthesis_args)
+    audio = audio_response["AudioStream"].read()
+    
+    clips: Dict[str, bytes] = {}
+    for text, clip in zip(chunk, split_mp3(audio, [offsets[str(i)] for i in range(len(chunk))])):
+        save_audio_to_cache(text, clip)
+        clips[text] = clip
+    return clips
+
+def synthesize_batch_and_cache(texts: List[str]) -> Dict[str, bytes]:
+    """
+    Generate audio for several distinct texts, as few SSML renderings as possible
+
+    Each chunk runs under the cross-process locks of all its texts, taken
+    once per stripe in sorted order so that overlapping batches cannot
+    deadlock. Texts that another worker cached while we waited are read
+    from the cache instead.
+    """
+    clips: Dict[str, bytes] = {}
+    
+    for chunk in polly_batch_chunks(texts):
+        with ExitStack() as locks:
+            for stripe in sorted({audio_lock_stripe(text) for text in chunk}):
+                locks.enter_context(audio_stripe_lock(stripe, timeout=polly_service.deadline))
+            
+            remaining = []
+            for text in chunk:
+                try:
+                    clips[text] = get_audio_cache_path(text).read_bytes()
+                except FileNotFoundError:
+                    remaining.append(text)
+            if remaining:
+                clips.update(synthesize_chunk(remaining))
     
-    1. Format the prompt with the words
-    2. Call the Bedrock API with the prompt
-    3. Parse the response JSON
-    4. Return the processed words
+    return clips
+
+@router.post("/generate-speech-batch")
+async def generate_speech_batch(request: BatchSpeechRequest, http_request: Request):
+    """
+    Generate speech for several texts (e.g. a word and its examples) in one request
+
+    Cached texts are answered from the cache; the rest are rendered together
+    with a single SSML synthesis and split into per-text clips.
     """
+    texts = [text for text in request.texts if text.strip()]
+    if not texts:
+        raise HTTPException(status_code=400, detail="请提供至少一段文本")
+    if len(texts) > MAX_BATCH_SPEECH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"一次最多合成 {MAX_BATCH_SPEECH_TEXTS} 段文本")
+    
+    speech_limiter.check(get_request_user(http_request, request.userId), cost=len(texts))
+    
     try:
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name='us-east-1'
-        )
+        audio: Dict[str, str] = {}
+        for text in dict.fromkeys(texts):
+            cached_audio = await get_cached_audio(text)
+            if cached_audio:
+                audio[text] = cached_audio
+        
+        missing = [text for text in dict.fromkeys(texts) if text not in audio]
+        if missing:
+            async with polly_gate.slot(PRIORITY_INTERACTIVE):
+                generated = await run_in_threadpool(synthesize_batch_and_cache, missing)
+            for text, clip in generated.items():
+                audio[text] = base64.b64encode(clip).decode('utf-8')
+                hot_audio_cache.put(get_audio_cache_path(text).stem, audio[text])
         
-        # Format the prompt for Claude
-        prompt = f"""
+        return {
+            "clips": [
+                {"text": text, "audio": audio[text], "format": "mp3", "cached": text not in missing}
+                for text in texts
+            ],
+            "status": "success"
+        }
+    except QueueFullError as e:
+        raise too_many_requests(e.retry_after, "语音生成请求过多，请稍后再试")
+    except Exception as e:
+        logging.error(f"Error generating batch speech: {str(e)}")
+        return {"message": f"语音生成失败: {str(e)}", "status": "error"}
+
+# Bedrock Claude settings
+CLAUDE_MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'  # Use the latest Claude model available
+CLAUDE_MAX_OUTPUT_TOKENS = 4000
+# Tokens for the {"words": [...]} wrapper around the per-word objects
+CLAUDE_JSON_OVERHEAD_TOKENS = 40
+# Starting estimate of output tokens per word (phonetic, meaning, 3 bilingual examples)
+INITIAL_TOKENS_PER_WORD = 220.0
+# Head-room applied to the estimate when sizing batches and max_tokens
+TOKEN_SAFETY_MARGIN = 1.25
+
+
+class OutputSizeEstimator:
+    """
+    Running estimate of Claude output tokens per processed word
+
+    Updated from the usage reported by every Bedrock response, so batch
+    sizes track what the model actually produces.
+    """
+
+    def __init__(self, initial: float, smoothing: float = 0.3):
+        self.tokens_per_word = initial
+        self.smoothing = smoothing
+
+    def observe(self, output_tokens: int, word_count: int) -> None:
+        if word_count <= 0 or output_tokens <= 0:
+            return
+        sample = max(output_tokens - CLAUDE_JSON_OVERHEAD_TOKENS, 1) / word_count
+        self.tokens_per_word += self.smoothing * (sample - self.tokens_per_word)
+
+    def batch_size(self) -> int:
+        budget = CLAUDE_MAX_OUTPUT_TOKENS - CLAUDE_JSON_OVERHEAD_TOKENS
+        return max(1, int(budget / (self.tokens_per_word * TOKEN_SAFETY_MARGIN)))
+
+    def max_tokens_for(self, word_count: int) -> int:
+        needed = word_count * self.tokens_per_word * TOKEN_SAFETY_MARGIN + CLAUDE_JSON_OVERHEAD_TOKENS
+        return min(CLAUDE_MAX_OUTPUT_TOKENS, int(needed) + 1)
+
+
+output_size_estimator = OutputSizeEstimator(INITIAL_TOKENS_PER_WORD)
+
+
+def build_word_prompt(words: List[str]) -> str:
+    """
+    Format the Claude prompt for a list of words
+    """
+    return f"""
         ## Instruction
         You are an expert English teacher specializing in vocabulary instruction. Your task is to create bilingual learning materials for a given word list, following these requirements:
 
@@ -368,84 +879,267 @@ def call_bedrock_claude(words: List[str]) -> Dict[str, Any]:
 
         Do not include any text outside the JSON structure.
         """
-        
-        # Prepare request body for Claude model
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4000,
-            "temperature": 0.5,
-            "top_p": 0.9,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        }
-        
-        # Call Bedrock Runtime API
-        response = bedrock_runtime.invoke_model(
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',  # Use the latest Claude model available
-            body=json.dumps(request_body),
-            contentType='application/json',
-            accept='application/json'
-        )
-        
-        # Parse response
-        response_body = json.loads(response['body'].read().decode('utf-8'))
-        
-        # Extract the completion from the response
-        completion = response_body.get('content', [{}])[0].get('text', '{}')
-        
-        # Parse the JSON from the completion
+
+
+def parse_words_completion(completion: str) -> List[Dict[str, Any]]:
+    """
+    Parse the word objects out of a Claude completion
+
+    A complete response is parsed as a whole. If that fails (e.g. the
+    completion was cut off at max_tokens), every fully-formed object in
+    the "words" array is salvaged and the partial tail is dropped.
+    """
+    try:
+        result = json.loads(completion)
+        if isinstance(result, dict) and isinstance(result.get("words"), list):
+            return [w for w in result["words"] if isinstance(w, dict)]
+    except json.JSONDecodeError:
+        pass
+
+    words_key = completion.find('"words"')
+    start = completion.find("[", words_key if words_key != -1 else 0)
+    if start == -1:
+        return []
+
+    decoder = json.JSONDecoder()
+    salvaged = []
+    pos = start + 1
+    while True:
+        # Skip whitespace and separators between array elements
+        while pos < len(completion) and completion[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(completion) or completion[pos] != "{":
+            break
         try:
-            result = json.loads(completion)
-            return result
+            obj, pos = decoder.raw_decode(completion, pos)
         except json.JSONDecodeError:
-            logging.error("Failed to parse JSON from Claude response")
-            # Fall back to mock data
+            break
+        if isinstance(obj, dict):
+            salvaged.append(obj)
+    return salvaged
+
+
+def invoke_claude(bedrock_runtime, words: List[str], max_tokens: int) -> Dict[str, Any]:
+    """
+    Send one batch of words to Claude
+
+    Returns the parsed words together with the stop reason and the number
+    of output tokens the model reported.
+    """
+    # Prepare request body for Claude model
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": 0.5,
+        "top_p": 0.9,
+        "messages": [
+            {
+                "role": "user",
+                "content": build_word_prompt(words)
+            }
+        ]
+    }
+
+    # Call Bedrock Runtime API
+    response = bedrock_service.call(
+        bedrock_runtime.invoke_model,
+        modelId=CLAUDE_MODEL_ID,
+        body=json.dumps(request_body),
+        contentType='application/json',
+        accept='application/json'
+    )
+
+    # Parse response
+    response_body = json.loads(response['body'].read().decode('utf-8'))
+
+    # Extract the completion from the response
+    completion = response_body.get('content', [{}])[0].get('text', '{}')
+
+    return {
+        "words": parse_words_completion(completion),
+        "stop_reason": response_body.get('stop_reason'),
+        "output_tokens": response_body.get('usage', {}).get('output_tokens', 0)
+    }
+
+
+def assign_results(batch: List[str], returned: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Match returned word objects to positions in the requested batch
+
+    Words are matched by name first; anything left over (e.g. the model
+    returned a different inflection) fills the earliest unmatched slots,
+    since Claude answers in the order the words were given.
+    """
+    assigned: Dict[int, Dict[str, Any]] = {}
+    positions: Dict[str, List[int]] = {}
+    for index, word in enumerate(batch):
+        positions.setdefault(word.strip().lower(), []).append(index)
+
+    unmatched = []
+    for word_data in returned:
+        slots = positions.get(str(word_data.get("word", "")).strip().lower())
+        if slots:
+            assigned[slots.pop(0)] = word_data
+        else:
+            unmatched.append(word_data)
+
+    free = [index for index in range(len(batch)) if index not in assigned]
+    for index, word_data in zip(free, unmatched):
+        assigned[index] = word_data
+    return assigned
+
+
+def mock_word_data(word: str) -> Dict[str, Any]:
+    """
+    Build fallback word data when Claude is unavailable
+    """
+    word_lower = word.lower()
+    if word_lower in MOCK_DATA:
+        return {
+            "word": word,
+            "phonetic": MOCK_DATA[word_lower]["phonetic"],
+            "meaning": MOCK_DATA[word_lower]["meaning"],
+            "examples": MOCK_DATA[word_lower]["examples"]
+        }
+    return {
+        "word": word,
+        "phonetic": f"/ˈmɒk/",
+        "meaning": f"{word}的中文含义",
+        "examples": [
+            {"en": f"This is an example with **{word}**.", "zh": f"这是一个包含{word}的例句。"},
+            {"en": f"She used the **{word}** effectively.", "zh": f"她有效地使用了{word}。"},
+            {"en": f"Learning about **{word}** is interesting.", "zh": f"学习关于{word}的知识很有趣。"},
+        ]
+    }
+
+
+def lookup_dictionary_words(words: List[str]) -> Dict[int, Dict[str, Any]]:
+    """
+    Answer words found in the local dictionary index without a network call
+
+    Returns the word data keyed by position in `words`.
+    """
+    dictionary_index = get_dictionary_index()
+    if not dictionary_index:
+        return {}
+    results = {}
+    for index, word in enumerate(words):
+        entry = dictionary_index.lookup(word)
+        if entry:
+            results[index] = {"word": word, **entry}
+    return results
+
+# Function to call Amazon Bedrock Claude
+def call_bedrock_claude(words: List[str], admit: Callable[[], ContextManager] = nullcontext) -> Dict[str, Any]:
+    """
+    Call Amazon Bedrock Claude to process words
+
+    Returns one word object per input word, in input order. Each Bedrock
+    call runs inside admit(), so a long list takes a queue slot per batch
+    and interactive lookups can run between its batches.
+
+    1. Split the words into batches sized from the output-token estimate
+    2. Call the Bedrock API for each batch with a matching max_tokens
+    3. On truncation (stop_reason "max_tokens"), keep the fully-formed
+       words and re-request only the missing ones in a smaller batch
+    4. Words left out of a complete response are re-requested once
+    5. Fall back to mock data for anything Claude could not produce
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    pending = list(range(len(words)))
+    # Words already re-requested after Claude left them out of a complete response
+    retried = set()
+
+    # Upper bound on batch size; shrinks when a batch is truncated without progress
+    size_limit = len(pending)
+
+    try:
+        bedrock_runtime = get_bedrock_client()
+
+        while pending:
+            batch_size = min(output_size_estimator.batch_size(), size_limit)
+            batch_indices = pending[:batch_size]
+            batch = [words[i] for i in batch_indices]
+            max_tokens = output_size_estimator.max_tokens_for(len(batch))
+
+            with admit():
+                response = invoke_claude(bedrock_runtime, batch, max_tokens)
+            assigned = assign_results(batch, response["words"])
+            truncated = response["stop_reason"] == "max_tokens"
+
+            for position, word_data in assigned.items():
+                results[batch_indices[position]] = word_data
+            output_size_estimator.observe(response["output_tokens"], len(assigned))
+            missing = [batch_indices[p] for p in range(len(batch)) if p not in assigned]
+
+            if truncated:
+                logging.warning(
+                    f"Claude output truncated at {max_tokens} tokens, "
+                    f"salvaged {len(assigned)}/{len(batch)} words"
+                )
+                if not assigned:
+                    if len(batch) == 1:
+                        # A single word does not fit; give up on it
+                        logging.error(f"Claude could not produce word within token limit: {batch[0]}")
+                        results[batch_indices[0]] = mock_word_data(batch[0])
+                        missing = []
+                    else:
+                        size_limit = max(1, len(batch) // 2)
+                pending = missing + pending[len(batch):]
+            else:
+                if not assigned:
+                    logging.error("Failed to parse JSON from Claude response")
+                    for index in batch_indices:
+                        results[index] = mock_word_data(words[index])
+                    missing = []
+                elif missing:
+                    logging.warning(f"Claude returned {len(assigned)}/{len(batch)} words")
+                    for index in missing:
+                        if index in retried:
+                            results[index] = mock_word_data(words[index])
+                    missing = [index for index in missing if index not in retried]
+                    retried.update(missing)
+                pending = missing + pending[len(batch):]
+    except QueueFullError:
+        # Admission failures are answered with 429, not mock data
+        raise
     except Exception as e:
         logging.error(f"Error calling Bedrock: {str(e)}")
-        
-    # Return mock data if API call fails
-    result = {"words": []}
-    for word in words:
-        word_lower = word.lower()
-        if word_lower in MOCK_DATA:
-            result["words"].append({
-                "word": word,
-                "phonetic": MOCK_DATA[word_lower]["phonetic"],
-                "meaning": MOCK_DATA[word_lower]["meaning"],
-                "examples": MOCK_DATA[word_lower]["examples"]
-            })
-        else:
-            result["words"].append({
-                "word": word,
-                "phonetic": f"/ˈmɒk/",
-                "meaning": f"{word}的中文含义",
-                "examples": [
-                    {"en": f"This is an example with **{word}**.", "zh": f"这是一个包含{word}的例句。"},
-                    {"en": f"She used the **{word}** effectively.", "zh": f"她有效地使用了{word}。"},
-                    {"en": f"Learning about **{word}** is interesting.", "zh": f"学习关于{word}的知识很有趣。"},
-                ]
-            })
-    
-    return result
+
+    # Return mock data for anything the API could not process
+    for index in pending:
+        results[index] = mock_word_data(words[index])
+
+    return {"words": [results[index] for index in sorted(results)]}
 
 # DynamoDB functions
+_dynamodb_local = threading.local()
+
+# Tables already known to exist in this process
+_ensured_tables = set()
+
 def get_dynamodb_client():
     """
     Get a DynamoDB client
+
+    boto3 resources are not thread-safe, so each thread keeps its own.
     """
-    return boto3.resource(
-        'dynamodb',
-        region_name='us-east-1'
-    )
+    dynamodb = getattr(_dynamodb_local, 'resource', None)
+    if dynamodb is None:
+        import boto3
+        dynamodb = boto3.resource(
+            'dynamodb',
+            region_name='us-east-1'
+        )
+        _dynamodb_local.resource = dynamodb
+    return dynamodb
 
 def create_wordlist_table_if_not_exists():
     """
     Create the WordLists table if it doesn't exist
     """
+    if 'WordLists' in _ensured_tables:
+        return
     try:
         dynamodb = get_dynamodb_client()
         
@@ -499,6 +1193,7 @@ def create_wordlist_table_if_not_exists():
             logging.info("WordLists table created successfully")
         else:
             logging.info("WordLists table already exists")
+        _ensured_tables.add('WordLists')
     except Exception as e:
         logging.error(f"Error creating WordLists table: {str(e)}")
         raise
@@ -507,6 +1202,8 @@ def create_learning_records_table_if_not_exists():
     """
     Create the LearningRecords table if it doesn't exist
     """
+    if 'LearningRecords' in _ensured_tables:
+        return
     try:
         dynamodb = get_dynamodb_client()
         
@@ -588,12 +1285,303 @@ def create_learning_records_table_if_not_exists():
             logging.info("LearningRecords table created successfully")
         else:
             logging.info("LearningRecords table already exists")
+        _ensured_tables.add('LearningRecords')
     except Exception as e:
         logging.error(f"Error creating LearningRecords table: {str(e)}")
         raise
 
+def create_word_contents_table_if_not_exists():
+    """
+    Create the WordContents table if it doesn't exist
+    """
+    if 'WordContents' in _ensured_tables:
+        return
+    try:
+        dynamodb = get_dynamodb_client()
+        
+        # Check if table exists
+        existing_tables = dynamodb.meta.client.list_tables()['TableNames']
+        if 'WordContents' not in existing_tables:
+            table = dynamodb.create_table(
+                TableName='WordContents',
+                KeySchema=[
+                    {
+                        'AttributeName': 'contentId',
+                        'KeyType': 'HASH'  # Partition key
+                    }
+                ],
+                AttributeDefinitions=[
+                    {
+                        'AttributeName': 'contentId',
+                        'AttributeType': 'S'
+                    }
+                ],
+                ProvisionedThroughput={
+                    'ReadCapacityUnits': 5,
+                    'WriteCapacityUnits': 5
+                }
+            )
+            
+            # Wait for the table to be created
+            table.meta.client.get_waiter('table_exists').wait(TableName='WordContents')
+            logging.info("WordContents table created successfully")
+        else:
+            logging.info("WordContents table already exists")
+        _ensured_tables.add('WordContents')
+    except Exception as e:
+        logging.error(f"Error creating WordContents table: {str(e)}")
+        raise
+
+def create_user_stats_table_if_not_exists():
+    """
+    Create the UserStats table if it doesn't exist
+    """
+    if 'UserStats' in _ensured_tables:
+        return
+    try:
+        dynamodb = get_dynamodb_client()
+        
+        # Check if table exists
+        existing_tables = dynamodb.meta.client.list_tables()['TableNames']
+        if 'UserStats' not in existing_tables:
+            table = dynamodb.create_table(
+                TableName='UserStats',
+                KeySchema=[
+                    {
+                        'AttributeName': 'userId',
+                        'KeyType': 'HASH'  # Partition key
+                    }
+                ],
+                AttributeDefinitions=[
+                    {
+                        'AttributeName': 'userId',
+                        'AttributeType': 'S'
+                    }
+                ],
+                ProvisionedThroughput={
+                    'ReadCapacityUnits': 5,
+                    'WriteCapacityUnits': 5
+                }
+            )
+            
+            # Wait for the table to be created
+            table.meta.client.get_waiter('table_exists').wait(TableName='UserStats')
+            logging.info("UserStats table created successfully")
+        else:
+            logging.info("UserStats table already exists")
+        _ensured_tables.add('UserStats')
+    except Exception as e:
+        logging.error(f"Error creating UserStats table: {str(e)}")
+        raise
+
+# Per-user learning statistics live in a single UserStats item holding the
+# running totals plus one counter attribute per day and metric
+# ("day#2026-01-31#reviews"), so a stats query is one GetItem
+DAILY_STAT_METRICS = ['learned', 'reviews', 'reviewListAdded']
+
+def daily_stat_attribute(day: str, metric: str) -> str:
+    return f"day#{day}#{metric}"
+
+def user_stats_update(user_id: str, day: Optional[str] = None, **deltas: int) -> Optional[Dict[str, Any]]:
+    """
+    Build the UserStats update that adds to a user's stat counters
+
+    Keyword arguments are totals (wordsLearned, reviewListSize,
+    totalReviews) or daily metrics prefixed with "daily_" (daily_learned,
+    daily_reviews, daily_reviewListAdded), which are added to `day`'s rollup.
+    Returns None when there is nothing to add.
+    """
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return None
+    day = day or date.today().isoformat()
+    
+    names = {}
+    values = {':now': datetime.now().isoformat()}
+    additions = []
+    for i, (name, value) in enumerate(deltas.items()):
+        attribute = daily_stat_attribute(day, name[len('daily_'):]) if name.startswith('daily_') else name
+        names[f'#a{i}'] = attribute
+        values[f':v{i}'] = value
+        additions.append(f'#a{i} :v{i}')
+    
+    return {
+        'TableName': 'UserStats',
+        'Key': {'userId': user_id},
+        'UpdateExpression': f"ADD {', '.join(additions)} SET updatedAt = :now",
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+def update_user_stats(user_id: str, day: Optional[str] = None, **deltas: int) -> None:
+    """
+    Atomically add to a user's stat counters, on their own
+
+    Writes that change a single learning record use write_with_stats
+    instead, so the record and its counters cannot drift apart.
+    """
+    update = user_stats_update(user_id, day, **deltas)
+    if update is None:
+        return
+    create_user_stats_table_if_not_exists()
+    update.pop('TableName')
+    get_dynamodb_client().Table('UserStats').update_item(**update)
+
+def write_with_stats(operation: Dict[str, Any], user_id: str, **deltas: int) -> None:
+    """
+    Commit a learning record write and the stat counters it moves in one transaction
+
+    `operation` is a TransactWriteItems entry such as {'Put': {...}} or
+    {'Update': {...}}, with plain Python values like the Table API takes.
+    Raises TransactionCanceledException when a condition fails.
+    """
+    from boto3.dynamodb.types import TypeSerializer
+    serializer = TypeSerializer()
+    
+    operations = [operation]
+    stats = user_stats_update(user_id, **deltas)
+    if stats is not None:
+        create_user_stats_table_if_not_exists()
+        operations.append({'Update': stats})
+    
+    transact_items = []
+    for entry in operations:
+        (kind, params), = entry.items()
+        params = dict(params)
+        for field in ('Item', 'Key', 'ExpressionAttributeValues'):
+            if field in params:
+                params[field] = {name: serializer.serialize(value) for name, value in params[field].items()}
+        transact_items.append({kind: params})
+    get_dynamodb_client().meta.client.transact_write_items(TransactItems=transact_items)
+
+# Word content is stored once in WordContents, keyed by word and content hash;
+# word lists and learning records hold contentId references to it
+word_store = WordContentStore(
+    get_dynamodb_client,
+    cache_size=int(os.getenv("WORD_CONTENT_CACHE_SIZE", "20000"))
+)
+
+def word_from_data(word_data: Dict[str, Any]) -> Word:
+    """
+    Convert stored word data to a Word object
+    """
+    examples = []
+    for example_data in word_data.get('examples', []):
+        examples.append(Example(
+            en=example_data.get('en', ''),
+            zh=example_data.get('zh', '')
+        ))
+    
+    return Word(
+        word=word_data.get('word', ''),
+        phonetic=word_data.get('phonetic', ''),
+        meaning=word_data.get('meaning', ''),
+        examples=examples
+    )
+
+def resolve_content_refs(items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve every word content reference in a set of items with batched reads
+    """
+    content_ids = []
+    for item in items:
+        content_ids.extend(item.get('wordRefs', []))
+        if item.get('contentId'):
+            content_ids.append(item['contentId'])
+    if not content_ids:
+        return {}
+    create_word_contents_table_if_not_exists()
+    return word_store.resolve(content_ids)
+
+def wordlist_words(item: Dict[str, Any], contents: Dict[str, Dict[str, Any]]) -> List[Word]:
+    """
+    The words of a stored word list, from references or (older items) embedded copies
+    """
+    if 'wordRefs' in item:
+        return [word_from_data(contents[cid]) for cid in item['wordRefs'] if cid in contents]
+    return [word_from_data(word_data) for word_data in item.get('words', [])]
+
+def learning_record_response(item: Dict[str, Any], contents: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the API representation of a stored learning record
+    """
+    # Older records embed the word content instead of referencing it
+    content = contents.get(item.get('contentId', ''), item)
+    word = word_from_data({**content, 'word': item.get('word', content.get('word', ''))})
+    return {
+        'wordId': item.get('wordId', ''),
+        'userId': item.get('userId', ''),
+        'word': word.word,
+        'phonetic': word.phonetic,
+        'meaning': word.meaning,
+        'examples': word.examples,
+        'reviewCount': item.get('reviewCount', 0),
+        'lastReviewedAt': item.get('lastReviewedAt'),
+        'createdAt': item.get('createdAt', ''),
+        'isInReviewList': bool(item.get('isInReviewList', 0))
+    }
+
+# HTTP caching helpers for word list endpoints
+def make_etag(*parts: str) -> str:
+    """
+    Build a weak ETag from version-identifying values
+    """
+    digest = hashlib.sha1("\x1f".join(parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+def to_http_date(timestamp: str) -> Optional[str]:
+    """
+    Convert a stored ISO timestamp to an HTTP date for Last-Modified
+    """
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    # Timestamps are stored as naive local times
+    return format_datetime(parsed.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """
+    Evaluate If-None-Match (preferred) or If-Modified-Since against the current version
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: ignore the W/ prefix on both sides
+        return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def has_conditional_headers(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def set_cache_headers(response: Response, etag: str, last_modified: Optional[str]) -> None:
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = last_modified
+    # Clients may store the list but must revalidate before reusing it
+    response.headers["Cache-Control"] = "private, no-cache"
+
+def not_modified_response(etag: str, last_modified: Optional[str]) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, last_modified)
+    return response
+
+def wordlists_version(items: List[Dict[str, Any]]) -> Tuple[str, Optional[str]]:
+    """
+    ETag and Last-Modified for a user's collection of word lists
+    """
+    versions = sorted(f"{item.get('id', '')}@{item.get('updatedAt', '')}" for item in items)
+    latest = max((item.get('updatedAt', '') for item in items), default='')
+    return make_etag(*versions), to_http_date(latest)
+
 # DynamoDB endpoints
-@app.post("/save-wordlist", response_model=WordListResponse)
+@router.post("/save-wordlist", response_model=WordListResponse)
 async def save_wordlist(wordlist_input: WordListInput):
     """
     Save a word list to DynamoDB
@@ -606,6 +1594,10 @@ async def save_wordlist(wordlist_input: WordListInput):
         dynamodb = get_dynamodb_client()
         table = dynamodb.Table('WordLists')
         
+        # Store each word's content once and reference it from the list
+        create_word_contents_table_if_not_exists()
+        word_refs = word_store.put_words(word.dict() for word in wordlist_input.words)
+        
         # Generate a unique ID for the word list
         list_id = str(uuid.uuid4())
         current_time = datetime.now().isoformat()
@@ -614,7 +1606,7 @@ async def save_wordlist(wordlist_input: WordListInput):
         item = {
             'id': list_id,
             'name': wordlist_input.name,
-            'words': [word.dict() for word in wordlist_input.words],
+            'wordRefs': word_refs,
             'userId': wordlist_input.userId,
             'createdAt': current_time,
             'updatedAt': current_time
@@ -636,10 +1628,13 @@ async def save_wordlist(wordlist_input: WordListInput):
         logging.error(f"Error saving word list: {str(e)}")
         raise HTTPException(status_code=500, detail=f"保存单词列表时出错: {str(e)}")
 
-@app.get("/get-wordlists")
-async def get_wordlists(userId: str = Query(..., description="User ID")):
+@router.get("/get-wordlists")
+async def get_wordlists(request: Request, response: Response, userId: str = Query(..., description="User ID")):
     """
     Get all word lists for a user from DynamoDB
+
+    Supports conditional requests: the ETag covers the id and updatedAt of
+    every list, so a revalidation only needs a projected metadata query.
     """
     try:
         # Create the table if it doesn't exist
@@ -649,36 +1644,37 @@ async def get_wordlists(userId: str = Query(..., description="User ID")):
         dynamodb = get_dynamodb_client()
         table = dynamodb.Table('WordLists')
         
+        # Revalidate against list versions before fetching full items
+        if has_conditional_headers(request):
+            metadata = table.query(
+                IndexName='UserIdIndex',
+                KeyConditionExpression=dynamodb_key('userId').eq(userId),
+                ProjectionExpression='id, updatedAt'
+            )
+            etag, last_modified = wordlists_version(metadata.get('Items', []))
+            # Deleting a list does not move the latest updatedAt, so only the ETag is trusted here
+            if is_not_modified(request, etag, None):
+                return not_modified_response(etag, last_modified)
+        
         # Query the table for the user's word lists
-        response = table.query(
+        query_response = table.query(
             IndexName='UserIdIndex',
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('userId').eq(userId)
+            KeyConditionExpression=dynamodb_key('userId').eq(userId)
         )
+        items = query_response.get('Items', [])
+        etag, last_modified = wordlists_version(items)
+        set_cache_headers(response, etag, last_modified)
+        
+        # Resolve the word references of all lists in one batched lookup
+        contents = resolve_content_refs(items)
         
         # Convert the DynamoDB items to WordListResponse objects
         wordlists = []
-        for item in response.get('Items', []):
-            # Convert the words from DynamoDB format to Word objects
-            words = []
-            for word_data in item.get('words', []):
-                examples = []
-                for example_data in word_data.get('examples', []):
-                    examples.append(Example(
-                        en=example_data.get('en', ''),
-                        zh=example_data.get('zh', '')
-                    ))
-                
-                words.append(Word(
-                    word=word_data.get('word', ''),
-                    phonetic=word_data.get('phonetic', ''),
-                    meaning=word_data.get('meaning', ''),
-                    examples=examples
-                ))
-            
+        for item in items:
             wordlists.append({
                 'id': item.get('id', ''),
                 'name': item.get('name', ''),
-                'words': words,
+                'words': wordlist_words(item, contents),
                 'userId': item.get('userId', ''),
                 'createdAt': item.get('createdAt', ''),
                 'updatedAt': item.get('updatedAt', '')
@@ -689,10 +1685,13 @@ async def get_wordlists(userId: str = Query(..., description="User ID")):
         logging.error(f"Error getting word lists: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取单词列表时出错: {str(e)}")
 
-@app.get("/get-wordlist/{list_id}")
-async def get_wordlist(list_id: str):
+@router.get("/get-wordlist/{list_id}")
+async def get_wordlist(list_id: str, request: Request, response: Response):
     """
     Get a specific word list from DynamoDB
+
+    Supports conditional requests: the ETag and Last-Modified come from the
+    list's updatedAt, so a revalidation only needs a projected metadata read.
     """
     try:
         # Create the table if it doesn't exist
@@ -702,31 +1701,28 @@ async def get_wordlist(list_id: str):
         dynamodb = get_dynamodb_client()
         table = dynamodb.Table('WordLists')
         
+        # Revalidate against the list's version before fetching the words
+        if has_conditional_headers(request):
+            metadata = table.get_item(Key={'id': list_id}, ProjectionExpression='id, updatedAt')
+            if 'Item' in metadata:
+                updated_at = metadata['Item'].get('updatedAt', '')
+                etag, last_modified = make_etag(list_id, updated_at), to_http_date(updated_at)
+                if is_not_modified(request, etag, last_modified):
+                    return not_modified_response(etag, last_modified)
+        
         # Get the word list from DynamoDB
-        response = table.get_item(Key={'id': list_id})
+        get_response = table.get_item(Key={'id': list_id})
         
         # Check if the item exists
-        if 'Item' not in response:
+        if 'Item' not in get_response:
             raise HTTPException(status_code=404, detail=f"单词列表不存在: {list_id}")
         
-        item = response['Item']
+        item = get_response['Item']
+        updated_at = item.get('updatedAt', '')
+        set_cache_headers(response, make_etag(list_id, updated_at), to_http_date(updated_at))
         
         # Convert the words from DynamoDB format to Word objects
-        words = []
-        for word_data in item.get('words', []):
-            examples = []
-            for example_data in word_data.get('examples', []):
-                examples.append(Example(
-                    en=example_data.get('en', ''),
-                    zh=example_data.get('zh', '')
-                ))
-            
-            words.append(Word(
-                word=word_data.get('word', ''),
-                phonetic=word_data.get('phonetic', ''),
-                meaning=word_data.get('meaning', ''),
-                examples=examples
-            ))
+        words = wordlist_words(item, resolve_content_refs([item]))
         
         # Return the word list
         return WordListResponse(
@@ -743,7 +1739,7 @@ async def get_wordlist(list_id: str):
         logging.error(f"Error getting word list: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取单词列表时出错: {str(e)}")
 
-@app.post("/save-learning-record")
+@router.post("/save-learning-record")
 async def save_learning_record(record_input: LearningRecordInput):
     """
     Save a learning record to DynamoDB
@@ -752,9 +1748,9 @@ async def save_learning_record(record_input: LearningRecordInput):
         # Create the table if it doesn't exist
         create_learning_records_table_if_not_exists()
         
-        # Get the DynamoDB client
-        dynamodb = get_dynamodb_client()
-        table = dynamodb.Table('LearningRecords')
+        # Store the word's content once and reference it from the record
+        create_word_contents_table_if_not_exists()
+        content_id = word_store.put_words([record_input.word.dict()])[0]
         
         # Generate a unique ID for the word
         word_id = str(uuid.uuid4())
@@ -765,17 +1761,26 @@ async def save_learning_record(record_input: LearningRecordInput):
             'wordId': word_id,
             'userId': record_input.userId,
             'word': record_input.word.word,
-            'phonetic': record_input.word.phonetic,
-            'meaning': record_input.word.meaning,
-            'examples': [example.dict() for example in record_input.word.examples],
+            'contentId': content_id,
             'reviewCount': 0,
             'lastReviewedAt': None,
             'createdAt': current_time,
             'isInReviewList': 1 if record_input.addToReviewList else 0  # Use 1/0 for boolean in DynamoDB
         }
         
-        # Save the item to DynamoDB
-        table.put_item(Item=item)
+        # Save the item together with the user's stat counters and today's rollup
+        review_delta = 1 if record_input.addToReviewList else 0
+        write_with_stats(
+            {'Put': {'TableName': 'LearningRecords', 'Item': item}},
+            record_input.userId,
+            wordsLearned=1,
+            reviewListSize=review_delta,
+            daily_learned=1,
+            daily_reviewListAdded=review_delta
+        )
+        
+        # Keep the user's search index (if built) up to date
+        search_indexes.add_record(record_input.userId, {**item, **record_input.word.dict()})
         
         # Return the saved item
         return {
@@ -792,7 +1797,7 @@ async def save_learning_record(record_input: LearningRecordInput):
         logging.error(f"Error saving learning record: {str(e)}")
         raise HTTPException(status_code=500, detail=f"保存学习记录时出错: {str(e)}")
 
-@app.get("/get-learning-records")
+@router.get("/get-learning-records")
 async def get_learning_records(userId: str = Query(..., description="User ID")):
     """
     Get all learning records for a user from DynamoDB
@@ -808,39 +1813,22 @@ async def get_learning_records(userId: str = Query(..., description="User ID")):
         # Query the table for the user's learning records
         response = table.query(
             IndexName='UserIdIndex',
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('userId').eq(userId)
+            KeyConditionExpression=dynamodb_key('userId').eq(userId)
         )
         
+        # Resolve word content references with batched reads
+        items = response.get('Items', [])
+        contents = resolve_content_refs(items)
+        
         # Convert the DynamoDB items to LearningRecord objects
-        records = []
-        for item in response.get('Items', []):
-            # Convert the examples from DynamoDB format
-            examples = []
-            for example_data in item.get('examples', []):
-                examples.append(Example(
-                    en=example_data.get('en', ''),
-                    zh=example_data.get('zh', '')
-                ))
-            
-            records.append({
-                'wordId': item.get('wordId', ''),
-                'userId': item.get('userId', ''),
-                'word': item.get('word', ''),
-                'phonetic': item.get('phonetic', ''),
-                'meaning': item.get('meaning', ''),
-                'examples': examples,
-                'reviewCount': item.get('reviewCount', 0),
-                'lastReviewedAt': item.get('lastReviewedAt'),
-                'createdAt': item.get('createdAt', ''),
-                'isInReviewList': bool(item.get('isInReviewList', 0))
-            })
+        records = [learning_record_response(item, contents) for item in items]
         
         return {'records': records}
     except Exception as e:
         logging.error(f"Error getting learning records: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取学习记录时出错: {str(e)}")
 
-@app.get("/get-review-list")
+@router.get("/get-review-list")
 async def get_review_list(userId: str = Query(..., description="User ID")):
     """
     Get all words in the review list for a user from DynamoDB
@@ -856,40 +1844,493 @@ async def get_review_list(userId: str = Query(..., description="User ID")):
         # Query the table for the user's review list
         response = table.query(
             IndexName='ReviewListIndex',
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('userId').eq(userId) & 
-                                  boto3.dynamodb.conditions.Key('isInReviewList').eq(1)
+            KeyConditionExpression=dynamodb_key('userId').eq(userId) & 
+                                  dynamodb_key('isInReviewList').eq(1)
         )
         
+        # Resolve word content references with batched reads
+        items = response.get('Items', [])
+        contents = resolve_content_refs(items)
+        
         # Convert the DynamoDB items to LearningRecord objects
-        records = []
-        for item in response.get('Items', []):
-            # Convert the examples from DynamoDB format
-            examples = []
-            for example_data in item.get('examples', []):
-                examples.append(Example(
-                    en=example_data.get('en', ''),
-                    zh=example_data.get('zh', '')
-                ))
-            
-            records.append({
-                'wordId': item.get('wordId', ''),
-                'userId': item.get('userId', ''),
-                'word': item.get('word', ''),
-                'phonetic': item.get('phonetic', ''),
-                'meaning': item.get('meaning', ''),
-                'examples': examples,
-                'reviewCount': item.get('reviewCount', 0),
-                'lastReviewedAt': item.get('lastReviewedAt'),
-                'createdAt': item.get('createdAt', ''),
-                'isInReviewList': bool(item.get('isInReviewList', 0))
-            })
+        records = [learning_record_response(item, contents) for item in items]
         
         return {'records': records}
     except Exception as e:
         logging.error(f"Error getting review list: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取复习列表时出错: {str(e)}")
 
-@app.post("/update-review-status")
+# Bulk export / import
+EXPORT_PAGE_SIZE = 100
+IMPORT_BATCH_SIZE = 25  # DynamoDB BatchWriteItem limit
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+
+def to_json_value(value: Any) -> Any:
+    """
+    json.dumps default for DynamoDB numbers
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def ndjson_line(data: Dict[str, Any]) -> bytes:
+    return (json.dumps(data, ensure_ascii=False, default=to_json_value) + "\n").encode('utf-8')
+
+def query_pages(table, **query_args) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield a query's results one page at a time
+    """
+    query_args['Limit'] = EXPORT_PAGE_SIZE
+    while True:
+        response = table.query(**query_args)
+        yield response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def export_user_data(user_id: str) -> Iterator[bytes]:
+    """
+    Stream a user's word lists and learning records as NDJSON, page by page
+
+    Word content references are resolved, so each line is self-contained
+    and can be imported into another environment. The tables are checked
+    and the first page of each query is read before returning, so missing
+    credentials or tables fail the request instead of truncating a 200.
+    """
+    create_wordlist_table_if_not_exists()
+    create_learning_records_table_if_not_exists()
+    dynamodb = get_dynamodb_client()
+    
+    wordlist_pages = query_pages(
+        dynamodb.Table('WordLists'),
+        IndexName='UserIdIndex',
+        KeyConditionExpression=dynamodb_key('userId').eq(user_id)
+    )
+    record_pages = query_pages(
+        dynamodb.Table('LearningRecords'),
+        IndexName='UserIdIndex',
+        KeyConditionExpression=dynamodb_key('userId').eq(user_id)
+    )
+    first_pages = (next(wordlist_pages), next(record_pages))
+    return export_lines(
+        user_id,
+        itertools.chain([first_pages[0]], wordlist_pages),
+        itertools.chain([first_pages[1]], record_pages)
+    )
+
+def export_lines(
+    user_id: str,
+    wordlist_pages: Iterator[List[Dict[str, Any]]],
+    record_pages: Iterator[List[Dict[str, Any]]]
+) -> Iterator[bytes]:
+    """
+    Yield the export header followed by one line per word list and learning record
+    """
+    yield ndjson_line({
+        'type': 'header',
+        'version': 1,
+        'userId': user_id,
+        'exportedAt': datetime.now().isoformat()
+    })
+    
+    for items in wordlist_pages:
+        contents = resolve_content_refs(items)
+        for item in items:
+            yield ndjson_line({
+                'type': 'wordlist',
+                'id': item.get('id', ''),
+                'name': item.get('name', ''),
+                'words': [word.dict() for word in wordlist_words(item, contents)],
+                'userId': item.get('userId', ''),
+                'createdAt': item.get('createdAt', ''),
+                'updatedAt': item.get('updatedAt', '')
+            })
+    
+    for items in record_pages:
+        contents = resolve_content_refs(items)
+        for item in items:
+            record = learning_record_response(item, contents)
+            yield ndjson_line({
+                'type': 'learningRecord',
+                'wordId': record['wordId'],
+                'userId': record['userId'],
+                'word': {
+                    'word': record['word'],
+                    'phonetic': record['phonetic'],
+                    'meaning': record['meaning'],
+                    'examples': [example.dict() for example in record['examples']]
+                },
+                'reviewCount': record['reviewCount'],
+                'lastReviewedAt': record['lastReviewedAt'],
+                'createdAt': record['createdAt'],
+                'isInReviewList': record['isInReviewList']
+            })
+
+@router.get("/export-user-data")
+async def export_user_data_endpoint(userId: str = Query(..., description="User ID")):
+    """
+    Export all of a user's word lists and learning records as streamed NDJSON
+    """
+    try:
+        lines = await run_in_threadpool(export_user_data, userId)
+    except Exception as e:
+        logging.error(f"Error exporting user data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"导出用户数据时出错: {str(e)}")
+    
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="export-{userId}.ndjson"'}
+    )
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parse NDJSON objects from a byte stream without buffering more than one line
+    """
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        # Complete lines may have arrived in one chunk, so check each of them too
+        if any(len(line) > MAX_IMPORT_LINE_BYTES for line in (*lines, buffer)):
+            raise ValueError("导入数据的单行过长")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+def existing_learning_records(user_id: str, word_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the stat-relevant fields of those records that already exist, keyed by wordId
+    """
+    dynamodb = get_dynamodb_client()
+    found: Dict[str, Dict[str, Any]] = {}
+    keys = [{'wordId': word_id, 'userId': user_id} for word_id in dict.fromkeys(word_ids)]
+    for start in range(0, len(keys), 100):  # BatchGetItem limit
+        request_items = {'LearningRecords': {
+            'Keys': keys[start:start + 100],
+            'ProjectionExpression': 'wordId, isInReviewList, reviewCount'
+        }}
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get('LearningRecords', []):
+                found[item['wordId']] = item
+            request_items = response.get('UnprocessedKeys') or None
+    return found
+
+def foreign_wordlist_ids(user_id: str, list_ids: List[str]) -> set:
+    """
+    Return those word list ids that already exist and belong to another user
+    """
+    dynamodb = get_dynamodb_client()
+    foreign = set()
+    keys = [{'id': list_id} for list_id in dict.fromkeys(list_ids)]
+    for start in range(0, len(keys), 100):  # BatchGetItem limit
+        request_items = {'WordLists': {
+            'Keys': keys[start:start + 100],
+            'ProjectionExpression': 'id, userId'
+        }}
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get('WordLists', []):
+                if item.get('userId') != user_id:
+                    foreign.add(item['id'])
+            request_items = response.get('UnprocessedKeys') or None
+    return foreign
+
+def import_progress(counts: Dict[str, int]) -> str:
+    """
+    Describe what a failed import already wrote
+    """
+    return f"（出错前已写入 {counts['wordlists']} 个单词列表和 {counts['learningRecords']} 条学习记录）"
+
+def write_import_batch(user_id: str, wordlists: List[Dict[str, Any]], records: List[Dict[str, Any]]) -> None:
+    """
+    Write one batch of imported word lists and learning records
+
+    Existing ids are kept, so re-running an import overwrites rather than
+    duplicates. Stats only move by the difference to the records being
+    overwritten, so re-imports are not counted twice. Word lists are keyed
+    by id alone, so a list whose id belongs to another user (e.g. when
+    copying one user's export to another in the same environment) gets a
+    new id derived from the importing user and the original id, instead of
+    taking over that user's list. The derived id is stable, so re-imports
+    still overwrite.
+    """
+    dynamodb = get_dynamodb_client()
+    
+    if wordlists:
+        # Resolve all word content of the batch in one go
+        refs = word_store.put_words(word for data in wordlists for word in data.get('words', []))
+        foreign = foreign_wordlist_ids(user_id, [data['id'] for data in wordlists if data.get('id')])
+        # The same id may appear twice in one batch; DynamoDB rejects duplicate keys
+        with dynamodb.Table('WordLists').batch_writer(overwrite_by_pkeys=['id']) as batch:
+            for data in wordlists:
+                count = len(data.get('words', []))
+                current_time = datetime.now().isoformat()
+                list_id = data.get('id') or str(uuid.uuid4())
+                if list_id in foreign:
+                    list_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}/{list_id}"))
+                batch.put_item(Item={
+                    'id': list_id,
+                    'name': data.get('name', ''),
+                    'wordRefs': refs[:count],
+                    'userId': user_id,
+                    'createdAt': data.get('createdAt') or current_time,
+                    'updatedAt': data.get('updatedAt') or current_time
+                })
+                refs = refs[count:]
+    
+    if records:
+        refs = word_store.put_words(data.get('word', {}) for data in records)
+        previous = existing_learning_records(user_id, [data['wordId'] for data in records if data.get('wordId')])
+        
+        totals = {'wordsLearned': 0, 'reviewListSize': 0, 'totalReviews': 0}
+        learned_per_day: Dict[str, int] = {}
+        with dynamodb.Table('LearningRecords').batch_writer(overwrite_by_pkeys=['wordId', 'userId']) as batch:
+            for data, content_id in zip(records, refs):
+                item = {
+                    'wordId': data.get('wordId') or str(uuid.uuid4()),
+                    'userId': user_id,
+                    'word': data.get('word', {}).get('word', ''),
+                    'contentId': content_id,
+                    'reviewCount': int(data.get('reviewCount', 0)),
+                    'lastReviewedAt': data.get('lastReviewedAt'),
+                    'createdAt': data.get('createdAt') or datetime.now().isoformat(),
+                    'isInReviewList': 1 if data.get('isInReviewList') else 0
+                }
+                batch.put_item(Item=item)
+                search_indexes.add_record(user_id, {**item, **data.get('word', {})})
+                
+                old = previous.get(item['wordId'])
+                if old is None:
+                    # New records count towards the user's stats on their original day
+                    totals['wordsLearned'] += 1
+                    day = item['createdAt'][:10]
+                    learned_per_day[day] = learned_per_day.get(day, 0) + 1
+                totals['reviewListSize'] += item['isInReviewList'] - int((old or {}).get('isInReviewList', 0))
+                totals['totalReviews'] += item['reviewCount'] - int((old or {}).get('reviewCount', 0))
+                # A later line with the same id overwrites this one
+                previous[item['wordId']] = item
+        
+        update_user_stats(user_id, **totals)
+        for day, count in learned_per_day.items():
+            update_user_stats(user_id, day=day, daily_learned=count)
+
+@router.post("/import-user-data")
+async def import_user_data(request: Request, userId: str = Query(..., description="User ID to import into")):
+    """
+    Import NDJSON produced by /export-user-data
+
+    The body is read line by line and written in batches; the next batch is
+    only read once the previous write finished, so a large import applies
+    backpressure to the client instead of accumulating in memory. Batches
+    written before an error are kept; the error reports how many there were.
+    """
+    counts = {'wordlists': 0, 'learningRecords': 0, 'skipped': 0}
+    try:
+        create_wordlist_table_if_not_exists()
+        create_learning_records_table_if_not_exists()
+        create_word_contents_table_if_not_exists()
+        
+        wordlists: List[Dict[str, Any]] = []
+        records: List[Dict[str, Any]] = []
+        
+        async for data in iter_ndjson(request.stream()):
+            if not isinstance(data, dict):
+                raise ValueError(f"每行必须是 JSON 对象，而不是 {type(data).__name__}")
+            line_type = data.get('type')
+            if line_type == 'wordlist':
+                wordlists.append(data)
+            elif line_type == 'learningRecord':
+                records.append(data)
+            elif line_type != 'header':
+                counts['skipped'] += 1
+            
+            if len(wordlists) + len(records) >= IMPORT_BATCH_SIZE:
+                await run_in_threadpool(write_import_batch, userId, wordlists, records)
+                counts['wordlists'] += len(wordlists)
+                counts['learningRecords'] += len(records)
+                wordlists, records = [], []
+        
+        if wordlists or records:
+            await run_in_threadpool(write_import_batch, userId, wordlists, records)
+            counts['wordlists'] += len(wordlists)
+            counts['learningRecords'] += len(records)
+        
+        logging.info(f"Imported data for user {userId}: {counts}")
+        return {'imported': counts, 'status': 'success'}
+    except (ValueError, json.JSONDecodeError) as e:
+        logging.error(f"Invalid import data after importing {counts}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"导入数据格式错误: {str(e)}{import_progress(counts)}")
+    except Exception as e:
+        logging.error(f"Error importing user data after importing {counts}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"导入用户数据时出错: {str(e)}{import_progress(counts)}")
+
+def load_search_records(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Load the fields needed for search from all of a user's learning records
+    """
+    create_learning_records_table_if_not_exists()
+    table = get_dynamodb_client().Table('LearningRecords')
+    
+    query_args = {
+        'IndexName': 'UserIdIndex',
+        'KeyConditionExpression': dynamodb_key('userId').eq(user_id),
+        'ProjectionExpression': 'wordId, #w, phonetic, meaning, contentId',
+        'ExpressionAttributeNames': {'#w': 'word'}
+    }
+    items = []
+    while True:
+        response = table.query(**query_args)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    # Records that reference their content need the meaning resolved
+    contents = resolve_content_refs(items)
+    for item in items:
+        content = contents.get(item.get('contentId', ''))
+        if content:
+            item.setdefault('phonetic', content['phonetic'])
+            item.setdefault('meaning', content['meaning'])
+    return items
+
+search_indexes = SearchIndexRegistry(
+    load_search_records,
+    max_users=int(os.getenv("SEARCH_INDEX_MAX_USERS", "1000")),
+    ttl=float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+)
+
+@router.get("/search-learning-records")
+async def search_learning_records(
+    userId: str = Query(..., description="User ID"),
+    q: str = Query(..., min_length=1, description="English word prefix or Chinese meaning"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results")
+):
+    """
+    Search a user's learned words with autocomplete and typo-tolerant matching
+    """
+    try:
+        # The first search for a user builds the index from DynamoDB
+        index = await run_in_threadpool(search_indexes.get, userId)
+        
+        return {'results': index.search(q, limit), 'status': 'success'}
+    except Exception as e:
+        logging.error(f"Error searching learning records: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"搜索学习记录时出错: {str(e)}")
+
+@router.get("/learning-stats")
+async def get_learning_stats(
+    userId: str = Query(..., description="User ID"),
+    days: int = Query(30, ge=1, le=366, description="Number of days of daily rollups")
+):
+    """
+    Get a user's learning statistics with a single item read
+    """
+    try:
+        create_user_stats_table_if_not_exists()
+        
+        item = get_dynamodb_client().Table('UserStats').get_item(Key={'userId': userId}).get('Item', {})
+        
+        today = date.today()
+        daily = []
+        for offset in range(days - 1, -1, -1):
+            day = (today - timedelta(days=offset)).isoformat()
+            daily.append({
+                'date': day,
+                **{metric: int(item.get(daily_stat_attribute(day, metric), 0)) for metric in DAILY_STAT_METRICS}
+            })
+        
+        return {
+            'userId': userId,
+            'wordsLearned': int(item.get('wordsLearned', 0)),
+            'reviewListSize': int(item.get('reviewListSize', 0)),
+            'totalReviews': int(item.get('totalReviews', 0)),
+            'daily': daily,
+            'updatedAt': item.get('updatedAt'),
+            'status': 'success'
+        }
+    except Exception as e:
+        logging.error(f"Error getting learning stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取学习统计时出错: {str(e)}")
+
+def rebuild_user_stats(user_id: str) -> Dict[str, int]:
+    """
+    Recompute a user's totals and daily "learned" rollups from their records
+
+    Used to backfill users whose records predate the counters, or after a
+    re-import. Daily review counts cannot be derived from records and are kept.
+    """
+    create_learning_records_table_if_not_exists()
+    create_user_stats_table_if_not_exists()
+    dynamodb = get_dynamodb_client()
+    
+    totals = {'wordsLearned': 0, 'reviewListSize': 0, 'totalReviews': 0}
+    learned_per_day: Dict[str, int] = {}
+    for items in query_pages(
+        dynamodb.Table('LearningRecords'),
+        IndexName='UserIdIndex',
+        KeyConditionExpression=dynamodb_key('userId').eq(user_id),
+        ProjectionExpression='createdAt, isInReviewList, reviewCount'
+    ):
+        for item in items:
+            totals['wordsLearned'] += 1
+            totals['reviewListSize'] += 1 if item.get('isInReviewList') else 0
+            totals['totalReviews'] += int(item.get('reviewCount', 0))
+            day = str(item.get('createdAt', ''))[:10]
+            if day:
+                learned_per_day[day] = learned_per_day.get(day, 0) + 1
+    
+    # SET only the recomputed attributes, so counters added concurrently
+    # (daily reviews, other days) are not overwritten by a stale copy
+    table = dynamodb.Table('UserStats')
+    existing = table.get_item(Key={'userId': user_id}).get('Item', {})
+    stale_days = [
+        name for name in existing
+        if name.startswith('day#') and name.endswith('#learned') and name.split('#')[1] not in learned_per_day
+    ]
+    
+    assignments = [
+        *totals.items(),
+        *((daily_stat_attribute(day, 'learned'), count) for day, count in learned_per_day.items())
+    ]
+    # Stay well inside the 4 KB update expression limit
+    for start in range(0, max(len(assignments), len(stale_days)), 100):
+        names = {'#now': 'updatedAt'}
+        values = {':now': datetime.now().isoformat()}
+        sets = ['#now = :now']
+        for i, (name, value) in enumerate(assignments[start:start + 100]):
+            names[f'#s{i}'] = name
+            values[f':s{i}'] = value
+            sets.append(f'#s{i} = :s{i}')
+        removes = []
+        for i, name in enumerate(stale_days[start:start + 100]):
+            names[f'#r{i}'] = name
+            removes.append(f'#r{i}')
+        table.update_item(
+            Key={'userId': user_id},
+            UpdateExpression=f"SET {', '.join(sets)}" + (f" REMOVE {', '.join(removes)}" if removes else ''),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    return totals
+
+@router.post("/rebuild-learning-stats")
+async def rebuild_learning_stats(userId: str = Query(..., description="User ID")):
+    """
+    Recompute a user's statistics from their learning records
+    """
+    try:
+        totals = await run_in_threadpool(rebuild_user_stats, userId)
+        return {'userId': userId, **totals, 'status': 'success'}
+    except Exception as e:
+        logging.error(f"Error rebuilding learning stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"重建学习统计时出错: {str(e)}")
+
+@router.post("/update-review-status")
 async def update_review_status(wordId: str, userId: str, addToReviewList: bool):
     """
     Update the review status of a word
@@ -900,21 +2341,38 @@ async def update_review_status(wordId: str, userId: str, addToReviewList: bool):
         
         # Get the DynamoDB client
         dynamodb = get_dynamodb_client()
-        table = dynamodb.Table('LearningRecords')
         
-        # Update the item in DynamoDB
-        response = table.update_item(
-            Key={
-                'wordId': wordId,
-                'userId': userId
-            },
-            UpdateExpression="set isInReviewList = :r, updatedAt = :u",
-            ExpressionAttributeValues={
-                ':r': 1 if addToReviewList else 0,
-                ':u': datetime.now().isoformat()
-            },
-            ReturnValues="UPDATED_NEW"
-        )
+        # Update the item and the user's stats in one transaction. Only an
+        # actual change of state moves the review list size, so the update
+        # is conditional on the state differing.
+        try:
+            write_with_stats(
+                {'Update': {
+                    'TableName': 'LearningRecords',
+                    'Key': {
+                        'wordId': wordId,
+                        'userId': userId
+                    },
+                    'UpdateExpression': "set isInReviewList = :r, updatedAt = :u",
+                    # Without attribute_exists, an unknown wordId would create a phantom record
+                    'ConditionExpression': "attribute_exists(wordId) AND isInReviewList <> :r",
+                    'ExpressionAttributeValues': {
+                        ':r': 1 if addToReviewList else 0,
+                        ':u': datetime.now().isoformat()
+                    },
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }},
+                userId,
+                reviewListSize=1 if addToReviewList else -1,
+                daily_reviewListAdded=1 if addToReviewList else 0
+            )
+        except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+            reason = e.response.get('CancellationReasons', [{}])[0]
+            if reason.get('Code') != 'ConditionalCheckFailed':
+                raise
+            # The record exists and is already in the requested state
+            if not reason.get('Item'):
+                raise HTTPException(status_code=404, detail=f"学习记录不存在: {wordId}")
         
         return {
             'wordId': wordId,
@@ -922,6 +2380,8 @@ async def update_review_status(wordId: str, userId: str, addToReviewList: bool):
             'isInReviewList': addToReviewList,
             'status': 'success'
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error updating review status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"更新复习状态时出错: {str(e)}")
@@ -935,31 +2395,32 @@ async def increment_review_count_task(wordId: str, userId: str):
         # Create the table if it doesn't exist
         create_learning_records_table_if_not_exists()
         
-        # Get the DynamoDB client
-        dynamodb = get_dynamodb_client()
-        table = dynamodb.Table('LearningRecords')
-        
-        # Update the item in DynamoDB
+        # Update the item and the user's stats in one transaction
         current_time = datetime.now().isoformat()
-        response = table.update_item(
-            Key={
-                'wordId': wordId,
-                'userId': userId
-            },
-            UpdateExpression="set reviewCount = reviewCount + :val, lastReviewedAt = :t",
-            ExpressionAttributeValues={
-                ':val': 1,
-                ':t': current_time
-            },
-            ReturnValues="UPDATED_NEW"
+        write_with_stats(
+            {'Update': {
+                'TableName': 'LearningRecords',
+                'Key': {
+                    'wordId': wordId,
+                    'userId': userId
+                },
+                'UpdateExpression': "set reviewCount = reviewCount + :val, lastReviewedAt = :t",
+                'ConditionExpression': "attribute_exists(wordId)",
+                'ExpressionAttributeValues': {
+                    ':val': 1,
+                    ':t': current_time
+                }
+            }},
+            userId,
+            totalReviews=1,
+            daily_reviews=1
         )
         
         logging.info(f"Successfully incremented review count for word {wordId}, user {userId}")
-        return response
     except Exception as e:
         logging.error(f"Error in background task incrementing review count: {str(e)}")
 
-@app.post("/increment-review-count")
+@router.post("/increment-review-count")
 async def increment_review_count(wordId: str, userId: str, background_tasks: BackgroundTasks):
     """
     Increment the review count of a word asynchronously
@@ -981,6 +2442,4 @@ async def increment_review_count(wordId: str, userId: str, background_tasks: Bac
         logging.error(f"Error scheduling review count increment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"安排增加复习次数时出错: {str(e)}")
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+app = create_app()
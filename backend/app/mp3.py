@@ -0,0 +1,62 @@
+from typing import Iterator, List, Tuple
+
+# Layer III bitrates (kbps) by bitrate index, for MPEG-1 and MPEG-2/2.5
+BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+# Sample rates by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+SAMPLE_RATES = {0: [11025, 12000, 8000], 2: [22050, 24000, 16000], 3: [44100, 48000, 32000]}
+
+
+def _skip_id3(data: bytes) -> int:
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, int, float]]:
+    """
+    Yield (offset, length, duration in ms) for each MPEG Layer III frame
+    """
+    pos = _skip_id3(data)
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version = (b1 >> 3) & 3
+        layer = (b1 >> 1) & 3
+        bitrate_index = (b2 >> 4) & 0xF
+        rate_index = (b2 >> 2) & 3
+        if (
+            data[pos] != 0xFF or (b1 & 0xE0) != 0xE0
+            or version == 1 or layer != 1
+            or bitrate_index in (0, 15) or rate_index == 3
+        ):
+            # Not a frame header; resynchronize
+            pos += 1
+            continue
+
+        bitrate = (BITRATES_MPEG1 if version == 3 else BITRATES_MPEG2)[bitrate_index] * 1000
+        sample_rate = SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        padding = (b2 >> 1) & 1
+        length = samples // 8 * bitrate // sample_rate + padding
+        yield pos, length, samples * 1000 / sample_rate
+        pos += length
+
+
+def split_mp3(data: bytes, offsets_ms: List[float]) -> List[bytes]:
+    """
+    Split an MP3 stream into clips starting at the given times
+
+    Cuts land on frame boundaries: each clip holds the frames that start
+    at or after its offset and before the next one.
+    """
+    clips = [bytearray() for _ in offsets_ms]
+    clip = 0
+    elapsed = 0.0
+    for pos, length, duration in iter_frames(data):
+        while clip + 1 < len(offsets_ms) and elapsed >= offsets_ms[clip + 1]:
+            clip += 1
+        clips[clip] += data[pos:pos + length]
+        elapsed += duration
+    return [bytes(c) for c in clips]
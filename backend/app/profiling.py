@@ -0,0 +1,159 @@
+import cProfile
+import hmac
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+# Server-Timing buckets, matched against the source file of each profiled function
+TIMING_CATEGORIES = [
+    ("aws", ("boto3", "botocore", "s3transfer", "urllib3")),
+    ("json", ("json",)),
+    ("pydantic", ("pydantic",)),
+]
+
+# The event loop waiting for I/O or a worker thread; not time spent by the request
+IDLE_FUNCTIONS = (
+    "of 'select.epoll' objects>",
+    "of 'select.kqueue' objects>",
+    "of 'select.poll' objects>",
+    "<built-in method select.select>",
+)
+
+# cProfile hooks the whole thread, so only one request is profiled at a time
+_profile_lock = threading.Lock()
+
+# Profiles of worker-thread calls made on behalf of the request being profiled
+_thread_profiles: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar("thread_profiles", default=None)
+
+
+async def run_in_threadpool(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    starlette's run_in_threadpool, also profiling the call when the current request is profiled
+
+    cProfile only sees the thread it was enabled on, so blocking work moved
+    off the event loop (boto3 calls, JSON parsing) gets its own profiler in
+    the worker thread, merged into the request's profile afterwards.
+    """
+    profiles = _thread_profiles.get()
+    if profiles is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+
+    def profiled() -> Any:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profiles.append(profiler)
+
+    return await _run_in_threadpool(profiled)
+
+
+def _categorize(filename: str) -> str:
+    """
+    Map a profiled function's source file to a Server-Timing category
+    """
+    parts = Path(filename).parts
+    for category, packages in TIMING_CATEGORIES:
+        if any(package in parts for package in packages):
+            return category
+    return "app"
+
+
+def summarize_profile(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Sum the own time (in milliseconds) spent in each category of code,
+    leaving out the event loop's idle polling
+    """
+    totals = {category: 0.0 for category, _ in TIMING_CATEGORIES}
+    totals["app"] = 0.0
+    for (filename, _, function), (_, _, tottime, _, callers) in stats.stats.items():
+        if function.endswith(IDLE_FUNCTIONS):
+            continue
+        if filename == "~" and callers:
+            # Builtins (socket reads, json's C scanner) count towards whoever called them
+            for (caller_filename, _, _), (_, _, caller_tottime, _) in callers.items():
+                totals[_categorize(caller_filename)] += caller_tottime * 1000
+        else:
+            totals[_categorize(filename)] += tottime * 1000
+    return totals
+
+
+def format_server_timing(total_ms: float, breakdown: Dict[str, float]) -> str:
+    """
+    Format a Server-Timing header value
+    """
+    entries = [f"total;dur={total_ms:.1f}"]
+    entries.extend(f"{name};dur={duration:.1f}" for name, duration in breakdown.items())
+    return ", ".join(entries)
+
+
+def install_profiling(app: FastAPI) -> None:
+    """
+    Install the per-request profiling middleware if profiling is configured
+
+    Profiling is triggered either by a request carrying the privileged
+    header with the configured token, or by the request path being listed
+    in PROFILE_PATHS. Nothing is installed when neither is configured.
+    """
+    token = os.getenv("PROFILE_TOKEN", "")
+    header_name = os.getenv("PROFILE_HEADER", "X-Profile-Token")
+    profile_paths: List[str] = [
+        path.strip() for path in os.getenv("PROFILE_PATHS", "").split(",") if path.strip()
+    ]
+    profile_dir = Path(os.getenv("PROFILE_DIR", "profiles"))
+
+    if not token and not profile_paths:
+        return
+
+    def should_profile(request: Request) -> bool:
+        if request.url.path in profile_paths:
+            return True
+        provided: Optional[str] = request.headers.get(header_name)
+        return bool(token and provided and hmac.compare_digest(provided, token))
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not should_profile(request) or not _profile_lock.acquire(blocking=False):
+            return await call_next(request)
+
+        profiler = cProfile.Profile()
+        thread_profiles: List[cProfile.Profile] = []
+        context_token = _thread_profiles.set(thread_profiles)
+        try:
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await call_next(request)
+            finally:
+                profiler.disable()
+            total_ms = (time.perf_counter() - start) * 1000
+        finally:
+            _thread_profiles.reset(context_token)
+            _profile_lock.release()
+
+        try:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            slug = request.url.path.strip("/").replace("/", "_") or "root"
+            artifact = profile_dir / f"{int(time.time())}-{slug}-{uuid.uuid4().hex[:8]}.prof"
+            stats = pstats.Stats(profiler, *thread_profiles)
+            stats.dump_stats(str(artifact))
+            response.headers["Server-Timing"] = format_server_timing(total_ms, summarize_profile(stats))
+            response.headers["X-Profile-Artifact"] = artifact.name
+            logging.info(f"Saved profile for {request.url.path} to {artifact}")
+        except Exception as e:
+            logging.error(f"Error saving request profile: {str(e)}")
+
+        return response
+
+    logging.info(f"Request profiling enabled, writing profiles to {profile_dir}")
@@ -0,0 +1,242 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict
+
+# Error codes worth retrying: throttling and transient server-side failures
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ServiceUnavailable",
+    "ServiceFailureException",
+    "InternalServerException",
+    "InternalFailure",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a service whose circuit breaker is open
+    """
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether an AWS error is transient (throttling, 5xx, timeouts, connection errors)
+    """
+    # botocore is imported lazily to keep it out of application import time
+    from botocore.exceptions import (
+        ClientError,
+        ConnectionError as BotoConnectionError,
+        ConnectTimeoutError,
+        EndpointConnectionError,
+        ReadTimeoutError,
+    )
+
+    if isinstance(error, (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError, BotoConnectionError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in RETRYABLE_ERROR_CODES or status >= 500 or status == 429
+    return False
+
+
+def client_config(deadline: float):
+    """
+    botocore config for a resilient client
+
+    botocore's own retry chain is disabled so that retries are governed by
+    the service's deadline and retry budget instead.
+    """
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=min(2.0, deadline),
+        read_timeout=deadline,
+        retries={"total_max_attempts": 1},
+    )
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated errors, then let a single probe through to recover
+
+    closed    -> calls pass; consecutive failures are counted
+    open      -> calls are rejected until recovery_timeout has elapsed
+    half_open -> one probe call is allowed; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = "half_open"
+                self.probe_in_flight = False
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logging.info(f"Circuit breaker for {self.name} closed")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    logging.warning(f"Circuit breaker for {self.name} opened after {self.consecutive_failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Limit retries to a fraction of overall traffic
+
+    Every call deposits `ratio` tokens and every retry spends one, so an
+    outage cannot multiply the load on a struggling service.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class ResilientService:
+    """
+    Deadline, jittered retries, retry budget and circuit breaker for one AWS service
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        retry_ratio: float = 0.2,
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = CircuitBreaker(name, failure_threshold, recovery_timeout)
+        self.budget = RetryBudget(retry_ratio)
+        self.stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "short_circuited": 0,
+            "budget_exhausted": 0,
+            "deadline_exceeded": 0,
+        }
+
+    @property
+    def config(self):
+        """
+        botocore client config matching this service's deadline
+        """
+        return client_config(self.deadline)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call func, retrying transient errors with full-jitter backoff within the deadline
+        """
+        self.stats["calls"] += 1
+        self.budget.deposit()
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            if not self.breaker.allow_request():
+                self.stats["short_circuited"] += 1
+                raise CircuitOpenError(f"{self.name} circuit breaker is open")
+
+            attempt += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The service answered; the request itself was bad
+                    self.breaker.record_success()
+                    self.stats["failures"] += 1
+                    raise
+                self.breaker.record_failure()
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                if attempt >= self.max_attempts:
+                    self.stats["failures"] += 1
+                    raise
+                if time.monotonic() - start + delay >= self.deadline:
+                    self.stats["failures"] += 1
+                    self.stats["deadline_exceeded"] += 1
+                    raise
+                if not self.budget.try_spend():
+                    self.stats["failures"] += 1
+                    self.stats["budget_exhausted"] += 1
+                    raise
+
+                self.stats["retries"] += 1
+                logging.warning(f"Retrying {self.name} call (attempt {attempt + 1}) after error: {str(e)}")
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            self.stats["successes"] += 1
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current breaker state and counters, for the metrics endpoint
+        """
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            "retry_tokens": round(self.budget.tokens, 2),
+            "deadline_seconds": self.deadline,
+            **self.stats,
+        }
@@ -0,0 +1,224 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _is_cjk(text: str) -> bool:
+    return any("一" <= ch <= "鿿" for ch in text)
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _cjk_bigrams(text: str) -> Set[str]:
+    chars = [ch for ch in text if _is_cjk(ch)]
+    if len(chars) == 1:
+        return set(chars)
+    return {chars[i] + chars[i + 1] for i in range(len(chars) - 1)}
+
+
+def _cjk_index_grams(text: str) -> Set[str]:
+    # Single characters are indexed too, so one-character queries match
+    return _cjk_bigrams(text) | {ch for ch in text if _is_cjk(ch)}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance, giving up (returning max_distance + 1) once it is exceeded
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class WordSearchIndex:
+    """
+    In-memory search index over one user's learning records
+
+    - a sorted key list for prefix (autocomplete) lookups
+    - a trigram index on English words for typo-tolerant matching
+    - a character bigram index on Chinese meanings for substring matching
+    """
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._sorted_keys: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._bigrams: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        word_id = record.get("wordId", "")
+        if not word_id:
+            return
+        entry = {
+            "wordId": word_id,
+            "word": record.get("word", ""),
+            "phonetic": record.get("phonetic", ""),
+            "meaning": record.get("meaning", ""),
+        }
+        key = entry["word"].strip().lower()
+        with self._lock:
+            if word_id in self.records:
+                return
+            self.records[word_id] = entry
+            bisect.insort(self._sorted_keys, (key, word_id))
+            for gram in _trigrams(key):
+                self._trigrams.setdefault(gram, set()).add(word_id)
+            for gram in _cjk_index_grams(entry["meaning"]):
+                self._bigrams.setdefault(gram, set()).add(word_id)
+
+    def _search_prefix(self, query: str, limit: int) -> List[str]:
+        # Walk forward from the first candidate; slicing would copy the rest of the keys
+        keys = self._sorted_keys
+        index = bisect.bisect_left(keys, (query, ""))
+        matches = []
+        while index < len(keys) and len(matches) < limit and keys[index][0].startswith(query):
+            matches.append(keys[index][1])
+            index += 1
+        return matches
+
+    def _search_fuzzy(self, query: str, limit: int) -> List[Tuple[int, str]]:
+        max_distance = 1 if len(query) <= 4 else 2
+        shared: Dict[str, int] = {}
+        for gram in _trigrams(query):
+            for word_id in self._trigrams.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+        # Only verify the candidates sharing the most trigrams with the query
+        candidates = sorted(shared, key=shared.get, reverse=True)[:limit * 10]
+        matches = []
+        for word_id in candidates:
+            key = self.records[word_id]["word"].strip().lower()
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, word_id))
+        return sorted(matches)
+
+    def _search_meaning(self, query: str) -> List[str]:
+        grams = _cjk_bigrams(query)
+        if not grams:
+            return []
+        candidates = set.intersection(*(self._bigrams.get(gram, set()) for gram in grams))
+        return sorted(
+            (word_id for word_id in candidates if query in self.records[word_id]["meaning"]),
+            key=lambda word_id: len(self.records[word_id]["meaning"])
+        )
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search by English prefix, then typo-tolerant English match, or by Chinese meaning
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        with self._lock:
+            if _is_cjk(query):
+                ranked = [(word_id, "meaning", 0) for word_id in self._search_meaning(query)]
+            else:
+                ranked = [(word_id, "prefix", 0) for word_id in self._search_prefix(query, limit)]
+                if len(ranked) < limit:
+                    seen = {word_id for word_id, _, _ in ranked}
+                    ranked.extend(
+                        (word_id, "fuzzy", distance)
+                        for distance, word_id in self._search_fuzzy(query, limit)
+                        if word_id not in seen
+                    )
+
+            return [
+                {**self.records[word_id], "matchType": match_type, "distance": distance}
+                for word_id, match_type, distance in ranked[:limit]
+            ]
+
+
+class SearchIndexRegistry:
+    """
+    Per-user search indexes, built lazily on first search and kept up to
+    date as records are saved. The least recently used indexes are evicted
+    once max_users is reached.
+
+    Indexes are rebuilt once older than `ttl` seconds, so records saved
+    through another worker process eventually show up. Builds run outside
+    the registry lock; concurrent searches for the same user wait for one
+    build, or keep using the stale index while it is rebuilt.
+    """
+
+    def __init__(self, loader: Callable[[str], Iterable[Dict[str, Any]]], max_users: int = 1000, ttl: float = 300):
+        self.loader = loader
+        self.max_users = max_users
+        self.ttl = ttl
+        self._indexes: "OrderedDict[str, Tuple[WordSearchIndex, float]]" = OrderedDict()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        # Records saved while a user's index is being built, applied once it is ready
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, user_id: str) -> Optional[WordSearchIndex]:
+        entry = self._indexes.get(user_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        self._indexes.move_to_end(user_id)
+        return entry[0]
+
+    def get(self, user_id: str) -> WordSearchIndex:
+        with self._lock:
+            index = self._fresh(user_id)
+            if index is not None:
+                return index
+            stale = self._indexes.get(user_id)
+            build_lock = self._build_locks.setdefault(user_id, threading.Lock())
+
+        # Serve the stale index rather than wait if another thread is already rebuilding it
+        if not build_lock.acquire(blocking=stale is None):
+            return stale[0]
+        try:
+            with self._lock:
+                index = self._fresh(user_id)
+                if index is not None:
+                    return index
+                self._pending[user_id] = []
+
+            index = WordSearchIndex()
+            try:
+                for record in self.loader(user_id):
+                    index.add(record)
+            finally:
+                with self._lock:
+                    pending = self._pending.pop(user_id, [])
+            for record in pending:
+                index.add(record)
+
+            with self._lock:
+                self._indexes[user_id] = (index, time.monotonic())
+                self._indexes.move_to_end(user_id)
+                while len(self._indexes) > self.max_users:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    evicted_lock = self._build_locks.get(evicted)
+                    if evicted_lock is not None and not evicted_lock.locked():
+                        del self._build_locks[evicted]
+            return index
+        finally:
+            build_lock.release()
+
+    def add_record(self, user_id: str, record: Dict[str, Any]) -> None:
+        """
+        Add a saved record to the user's index, if it has been built or is being built
+        """
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if user_id in self._pending:
+                self._pending[user_id].append(record)
+        if entry is not None:
+            entry[0].add(record)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# DynamoDB limit on keys per BatchGetItem request
+BATCH_GET_LIMIT = 100
+
+
+def word_content(word_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The fields that make up a word's content
+    """
+    return {
+        "word": word_data.get("word", ""),
+        "phonetic": word_data.get("phonetic", ""),
+        "meaning": word_data.get("meaning", ""),
+        "examples": [
+            {"en": example.get("en", ""), "zh": example.get("zh", "")}
+            for example in word_data.get("examples", [])
+        ],
+    }
+
+
+def content_id(word_data: Dict[str, Any]) -> str:
+    """
+    Content address of a word: normalized word plus a hash of its content
+
+    Identical content always maps to the same id, so a word is stored once
+    no matter how many lists and learning records refer to it.
+    """
+    content = word_content(word_data)
+    canonical = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:20]
+    return f"{content['word'].strip().lower()}#{digest}"
+
+
+class WordContentStore:
+    """
+    Immutable, content-addressed word storage in DynamoDB
+
+    Because an id always refers to the same content, resolved words are
+    kept in a process-wide LRU and never need invalidating.
+    """
+
+    def __init__(self, get_resource: Callable[[], Any], table_name: str = "WordContents", cache_size: int = 20000):
+        self.get_resource = get_resource
+        self.table_name = table_name
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, cid: str, content: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[cid] = content
+            self._cache.move_to_end(cid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cached(self, cid: str):
+        with self._lock:
+            content = self._cache.get(cid)
+            if content is not None:
+                self._cache.move_to_end(cid)
+            return content
+
+    def _batch_get(self, ids: List[str], projection: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Batched reads, retrying any UnprocessedKeys
+        """
+        dynamodb = self.get_resource()
+        found: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(ids), BATCH_GET_LIMIT):
+            request = {"Keys": [{"contentId": cid} for cid in ids[start:start + BATCH_GET_LIMIT]]}
+            if projection:
+                request["ProjectionExpression"] = projection
+            request_items = {self.table_name: request}
+            while request_items:
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    found[item["contentId"]] = item
+                request_items = response.get("UnprocessedKeys") or None
+        return found
+
+    def put_words(self, words: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Store word contents that are not stored yet and return their ids, in order
+        """
+        ids = []
+        contents: Dict[str, Dict[str, Any]] = {}
+        for word_data in words:
+            cid = content_id(word_data)
+            ids.append(cid)
+            contents[cid] = word_content(word_data)
+
+        # Skip ids known to exist; reads are cheaper than writes for the rest
+        unknown = [cid for cid in contents if self._cached(cid) is None]
+        existing = self._batch_get(unknown, projection="contentId") if unknown else {}
+        missing = [cid for cid in unknown if cid not in existing]
+
+        if missing:
+            table = self.get_resource().Table(self.table_name)
+            current_time = datetime.now().isoformat()
+            with table.batch_writer() as batch:
+                for cid in missing:
+                    batch.put_item(Item={"contentId": cid, **contents[cid], "createdAt": current_time})
+
+        for cid, content in contents.items():
+            self._remember(cid, content)
+        return ids
+
+    def resolve(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up word contents by id, reading uncached ones in batches
+        """
+        resolved: Dict[str, Dict[str, Any]] = {}
+        to_fetch = []
+        for cid in dict.fromkeys(ids):
+            content = self._cached(cid)
+            if content is not None:
+                resolved[cid] = content
+            else:
+                to_fetch.append(cid)
+
+        for cid, item in self._batch_get(to_fetch).items():
+            content = word_content(item)
+            self._remember(cid, content)
+            resolved[cid] = content
+        return resolved
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Runs in a fresh interpreter per sample, so every measurement is a cold start
+PROBE = r"""
+import asyncio, json, time
+
+start = time.perf_counter()
+import app.main
+# Importing app.main already builds the app with create_app()
+application = app.main.app
+imported = time.perf_counter()
+
+# Bedrock itself is stubbed; the lazy client, boto3 import and dictionary
+# mapping behind it still run on the first request
+def invoke_claude(bedrock_runtime, words, max_tokens):
+    return {"words": [app.main.mock_word_data(word) for word in words], "stop_reason": "end_turn", "output_tokens": 0}
+
+app.main.invoke_claude = invoke_claude
+
+
+async def request(method, path, body=None):
+    messages = []
+    data = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000), "root_path": "",
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": data, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]["status"]
+
+
+async def main():
+    timings = {}
+    # Drive the lifespan protocol, so WARM_START initialization is measured
+    events = asyncio.Queue()
+    replies = asyncio.Queue()
+    await events.put({"type": "lifespan.startup"})
+    lifespan = asyncio.create_task(application(
+        {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, events.get, replies.put
+    ))
+    begin = time.perf_counter()
+    assert (await replies.get())["type"] == "lifespan.startup.complete"
+    timings["startup_ms"] = (time.perf_counter() - begin) * 1000
+
+    begin = time.perf_counter()
+    statuses = [await request("POST", "/process-words", {"words": ["benchmark"]})]
+    timings["first_request_ms"] = (time.perf_counter() - begin) * 1000
+
+    begin = time.perf_counter()
+    statuses.append(await request("POST", "/process-words", {"words": ["benchmark"]}))
+    timings["warm_request_ms"] = (time.perf_counter() - begin) * 1000
+
+    await events.put({"type": "lifespan.shutdown"})
+    await replies.get()
+    await lifespan
+    timings["statuses"] = statuses
+    return timings
+
+timings = asyncio.run(main())
+finished = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    **timings,
+    "total_ms": (finished - start) * 1000,
+}))
+"""
+
+METRICS = ("import_ms", "startup_ms", "first_request_ms", "warm_request_ms", "total_ms")
+
+
+def run_sample(warm_start: bool) -> dict:
+    env = {
+        **os.environ,
+        "WARM_START": "true" if warm_start else "false",
+        # Clients are created but never used; dummy credentials avoid any credential lookup
+        "AWS_ACCESS_KEY_ID": os.getenv("AWS_ACCESS_KEY_ID", "benchmark"),
+        "AWS_SECRET_ACCESS_KEY": os.getenv("AWS_SECRET_ACCESS_KEY", "benchmark"),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=Path(__file__).parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    sample = json.loads(output.strip().splitlines()[-1])
+    if any(status != 200 for status in sample["statuses"]):
+        raise RuntimeError(f"Probe requests failed with statuses {sample['statuses']}")
+    return sample
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import time, startup and time to first request")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to sample")
+    parser.add_argument("--warm-start", action="store_true", help="Run with WARM_START=true")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    samples = [run_sample(args.warm_start) for _ in range(args.runs)]
+    summary = {
+        key: {
+            "median": round(statistics.median(s[key] for s in samples), 1),
+            "min": round(min(s[key] for s in samples), 1),
+            "max": round(max(s[key] for s in samples), 1),
+        }
+        for key in METRICS
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for key, stats in summary.items():
+            print(f"{key:>18}: median {stats['median']:8.1f}  min {stats['min']:8.1f}  max {stats['max']:8.1f}")
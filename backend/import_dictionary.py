@@ -0,0 +1,13 @@
+import argparse
+from pathlib import Path
+
+from app.dictionary import build_index, read_vocabulary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a vocabulary file (CSV or JSONL) into the dictionary index")
+    parser.add_argument("source", type=Path, help="CSV or JSONL file with word, phonetic, meaning and examples")
+    parser.add_argument("--output", type=Path, default=Path("dictionary.idx"), help="Index file to write")
+    args = parser.parse_args()
+
+    count = build_index(read_vocabulary(args.source), args.output)
+    print(f"Imported {count} words into {args.output}")
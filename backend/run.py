@@ -1,4 +1,32 @@
+import argparse
+import os
+
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Run the English learning API")
+    parser.add_argument("--prod", action="store_true", help="Run with multiple workers and no auto-reload")
+    args = parser.parse_args()
+
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8000"))
+
+    if args.prod or os.getenv("APP_ENV") == "production":
+        # One worker per core by default; each worker is a separate process,
+        # so the audio cache relies on atomic renames and file locks
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+            # Cap in-flight requests per worker; excess connections get a 503
+            limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY", "200")),
+            backlog=int(os.getenv("BACKLOG", "2048")),
+            # Keep idle connections from the frontend/proxy open between requests
+            timeout_keep_alive=int(os.getenv("KEEP_ALIVE_SECONDS", "30")),
+            proxy_headers=True,
+            forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+            access_log=os.getenv("ACCESS_LOG", "false").lower() == "true",
+        )
+    else:
+        uvicorn.run("app.main:app", host=host, port=port, reload=True)
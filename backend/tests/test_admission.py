@@ -0,0 +1,204 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+import app.admission as admission
+from app.admission import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PriorityGate,
+    QueueFullError,
+    RateLimiter,
+    TokenBucket,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert bucket.try_acquire(4) == 0
+    assert bucket.try_acquire(1) == pytest.approx(0.5)
+
+    clock[0] += 1
+    assert bucket.try_acquire(2) == 0
+    assert bucket.try_acquire(1) > 0
+
+    # Never refills past capacity
+    clock[0] += 100
+    assert bucket.try_acquire(4) == 0
+
+
+def test_token_bucket_lets_oversized_requests_through_with_a_full_bucket(clock):
+    bucket = TokenBucket(rate=1, capacity=10)
+    assert bucket.try_acquire(50) == 0
+    assert bucket.try_acquire(50) == pytest.approx(10)
+
+
+def test_rate_limiter_rejects_with_retry_after(clock):
+    limiter = RateLimiter("test", rate=1, capacity=2)
+    limiter.check("alice", cost=2)
+    with pytest.raises(HTTPException) as error:
+        limiter.check("alice", cost=1.5)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "2"
+    assert limiter.rejected == 1
+
+    # Other users have their own bucket
+    limiter.check("bob", cost=2)
+
+
+def test_rate_limiter_tracks_only_recent_users(clock):
+    limiter = RateLimiter("test", rate=1, capacity=1, max_keys=2)
+    limiter.check("a")
+    limiter.check("b")
+    limiter.check("c")
+    assert limiter.snapshot()["tracked_users"] == 2
+    # "a" was evicted and starts again with a full bucket
+    limiter.check("a")
+    with pytest.raises(HTTPException):
+        limiter.check("c")
+
+
+async def hold(gate, order, name, priority, release):
+    async with gate.slot(priority):
+        order.append(name)
+        await release.wait()
+
+
+def test_gate_admits_waiters_by_priority_then_arrival():
+    async def scenario():
+        gate = PriorityGate("test", max_concurrency=1, max_queue=10)
+        order = []
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(gate, order, "first", PRIORITY_BULK, release))]
+        await asyncio.sleep(0)
+        for name, priority in [("bulk1", PRIORITY_BULK), ("interactive1", PRIORITY_INTERACTIVE),
+                               ("bulk2", PRIORITY_BULK), ("interactive2", PRIORITY_INTERACTIVE)]:
+            tasks.append(asyncio.create_task(hold(gate, order, name, priority, release)))
+            await asyncio.sleep(0)
+        assert gate.snapshot()["queued"] == 4
+        release.set()
+        await asyncio.gather(*tasks)
+        assert gate.active == 0
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "interactive1", "interactive2", "bulk1", "bulk2"]
+
+
+def test_gate_rejects_when_the_queue_is_full():
+    async def scenario():
+        gate = PriorityGate("test", max_concurrency=1, max_queue=1, retry_after=3)
+        release = asyncio.Event()
+        order = []
+        tasks = [asyncio.create_task(hold(gate, order, name, PRIORITY_INTERACTIVE, release)) for name in "ab"]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError) as error:
+            await gate.acquire(PRIORITY_INTERACTIVE)
+        assert error.value.retry_after == 3
+        assert gate.rejected == 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        gate = PriorityGate("test", max_concurrency=1, max_queue=10)
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(hold(gate, order, "holder", PRIORITY_BULK, release))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(hold(gate, order, "cancelled", PRIORITY_INTERACTIVE, release))
+        waiter = asyncio.create_task(hold(gate, order, "waiter", PRIORITY_BULK, release))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert gate.snapshot()["queued"] == 1
+        release.set()
+        await asyncio.gather(holder, waiter)
+        assert gate.active == 0
+        return order
+
+    assert asyncio.run(scenario()) == ["holder", "waiter"]
+
+
+def test_waiter_cancelled_after_being_handed_the_slot_releases_it():
+    async def scenario():
+        gate = PriorityGate("test", max_concurrency=1, max_queue=10)
+        await gate.acquire(PRIORITY_INTERACTIVE)
+        waiter = asyncio.create_task(gate.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        # Hand over the slot and cancel before the waiter gets to run
+        gate.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert gate.active == 0
+        await gate.acquire(PRIORITY_INTERACTIVE)
+
+    asyncio.run(scenario())
+
+
+def test_waiting_longer_than_max_wait_is_rejected():
+    async def scenario():
+        gate = PriorityGate("test", max_concurrency=1, max_queue=10, max_wait=0.01)
+        await gate.acquire(PRIORITY_INTERACTIVE)
+        with pytest.raises(QueueFullError):
+            await gate.acquire(PRIORITY_INTERACTIVE)
+        assert gate.snapshot()["queued"] == 0
+        assert gate.rejected == 1
+        gate.release()
+        assert gate.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_thread_slot_holds_the_gate_from_a_worker_thread():
+    async def scenario():
+        gate = PriorityGate("test", max_concurrency=1, max_queue=10)
+        seen = []
+
+        def work():
+            with gate.thread_slot(PRIORITY_BULK):
+                seen.append(gate.active)
+
+        await asyncio.gather(run_in_threadpool(work), run_in_threadpool(work))
+        assert gate.active == 0
+        return seen
+
+    assert asyncio.run(scenario()) == [1, 1]
+
+
+def request(headers=None, query=b""):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/process-words",
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+def test_forwarded_user_ids_need_the_proxy_secret(monkeypatch):
+    from app.main import get_request_user
+
+    monkeypatch.delenv("BACKEND_PROXY_SECRET", raising=False)
+    assert get_request_user(request({"X-User-Id": "alice"}), "bob") == "10.0.0.1"
+
+    monkeypatch.setenv("BACKEND_PROXY_SECRET", "secret")
+    assert get_request_user(request({"X-User-Id": "alice", "X-Proxy-Secret": "wrong"})) == "10.0.0.1"
+    assert get_request_user(request({"X-User-Id": "alice", "X-Proxy-Secret": "secret"})) == "user:alice"
+    assert get_request_user(request({"X-Proxy-Secret": "secret"}), "bob") == "user:bob"
+    assert get_request_user(request({"X-Proxy-Secret": "secret"}, b"userId=carol")) == "user:carol"
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import app.main as main
+from app.dictionary import DictionaryIndex, build_index, open_dictionary, read_vocabulary
+
+
+def entry(word, meaning="含义"):
+    return {"word": word, "phonetic": f"/{word}/", "meaning": meaning, "examples": [{"en": f"A {word}.", "zh": "例句"}]}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return tmp_path / "dictionary.idx"
+
+
+def test_lookup_finds_every_word(index_path):
+    words = ["apple", "Banana", "café", "zebra", "a", "naïve", "词"]
+    assert build_index([entry(w) for w in words], index_path) == len(words)
+
+    index = DictionaryIndex(index_path)
+    assert len(index) == len(words)
+    for word in words:
+        found = index.lookup(word)
+        assert found["phonetic"] == f"/{word}/"
+        assert found["examples"] == [{"en": f"A {word}.", "zh": "例句"}]
+    index.close()
+
+
+def test_lookup_normalizes_and_misses_cleanly(index_path):
+    build_index([entry("apple"), entry("apples")], index_path)
+    index = DictionaryIndex(index_path)
+    assert index.lookup("  APPLE ")["phonetic"] == "/apple/"
+    for missing in ["appl", "applesauce", "", "zzz", "0"]:
+        assert index.lookup(missing) is None
+    index.close()
+
+
+def test_later_entries_replace_earlier_ones_and_blank_words_are_skipped(index_path):
+    assert build_index([entry("apple", "旧"), entry("Apple", "新"), entry("  ")], index_path) == 1
+    index = DictionaryIndex(index_path)
+    assert index.lookup("apple")["meaning"] == "新"
+    index.close()
+
+
+def test_empty_index(index_path):
+    build_index([], index_path)
+    index = DictionaryIndex(index_path)
+    assert len(index) == 0
+    assert index.lookup("apple") is None
+    index.close()
+
+
+def test_open_dictionary_tolerates_missing_and_invalid_files(index_path):
+    assert open_dictionary(index_path) is None
+    index_path.write_bytes(b"not an index at all")
+    assert open_dictionary(index_path) is None
+
+
+def test_read_vocabulary_csv_with_example_columns(tmp_path):
+    path = tmp_path / "words.csv"
+    path.write_text(
+        "word,phonetic,meaning,example_en_1,example_zh_1,example_en_2,example_zh_2\n"
+        "apple,/ˈæpl/,苹果,An apple.,一个苹果。,,\n",
+        encoding="utf-8",
+    )
+    assert list(read_vocabulary(path)) == [
+        {"word": "apple", "phonetic": "/ˈæpl/", "meaning": "苹果", "examples": [{"en": "An apple.", "zh": "一个苹果。"}]}
+    ]
+
+
+def test_read_vocabulary_jsonl(tmp_path):
+    path = tmp_path / "words.jsonl"
+    path.write_text(json.dumps(entry("apple"), ensure_ascii=False) + "\n\n", encoding="utf-8")
+    assert list(read_vocabulary(path)) == [entry("apple")]
+
+
+def test_replaced_index_is_mapped_again(index_path, monkeypatch):
+    monkeypatch.setenv("DICTIONARY_INDEX", str(index_path))
+    monkeypatch.setattr(main, "_dictionary_version", None)
+    monkeypatch.setattr(main, "_dictionary_index", None)
+    assert main.get_dictionary_index() is None
+
+    build_index([entry("apple")], index_path)
+    assert main.get_dictionary_index().lookup("apple") is not None
+
+    build_index([entry("apple"), entry("pear")], index_path)
+    assert main.get_dictionary_index().lookup("pear") is not None
+    assert main.lookup_dictionary_words(["pear", "plum", "apple"]).keys() == {0, 2}
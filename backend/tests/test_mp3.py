@@ -0,0 +1,111 @@
+import io
+import json
+
+import pytest
+
+import app.main as main
+from app.mp3 import iter_frames, split_mp3
+
+
+def frame(index, mpeg1=False, padding=False):
+    """
+    One Layer III frame whose payload is filled with its index, so clips can be checked frame by frame
+    """
+    if mpeg1:
+        # MPEG-1, 128 kbps, 44.1 kHz: 417 bytes (+1 padded), 26.12 ms
+        header = bytes([0xFF, 0xFB, 0x90 | (padding << 1), 0x00])
+        length = 417 + padding
+    else:
+        # MPEG-2, 48 kbps, 24 kHz: 144 bytes (+1 padded), 24 ms
+        header = bytes([0xFF, 0xF3, 0x64 | (padding << 1), 0x00])
+        length = 144 + padding
+    return header + bytes([index % 256]) * (length - 4)
+
+
+def frames_of(clip):
+    return [clip[pos + 4] for pos, _, _ in iter_frames(clip)]
+
+
+def test_iter_frames_reads_lengths_and_durations():
+    data = frame(0) + frame(1, padding=True) + frame(2, mpeg1=True) + frame(3, mpeg1=True, padding=True)
+    frames = list(iter_frames(data))
+    assert [(pos, length) for pos, length, _ in frames] == [(0, 144), (144, 145), (289, 417), (706, 418)]
+    assert [round(duration, 2) for _, _, duration in frames] == [24.0, 24.0, 26.12, 26.12]
+
+
+def test_iter_frames_skips_id3_tags_and_resynchronizes():
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"\xff" * 5
+    data = id3 + frame(0) + b"junk\xff\x00" + frame(1)
+    assert frames_of(data) == [0, 1]
+
+
+def test_split_mp3_cuts_on_frame_boundaries():
+    data = b"".join(frame(i) for i in range(10))
+    # 24 ms frames: clip boundaries fall inside frames 2 and 6
+    clips = split_mp3(data, [0, 50, 150])
+    assert [frames_of(clip) for clip in clips] == [[0, 1, 2], [3, 4, 5, 6], [7, 8, 9]]
+    # Every byte ends up in exactly one clip
+    assert b"".join(clips) == data
+
+
+def test_split_mp3_frame_starting_exactly_at_an_offset_begins_the_next_clip():
+    data = b"".join(frame(i) for i in range(4))
+    assert [frames_of(clip) for clip in split_mp3(data, [0, 48])] == [[0, 1], [2, 3]]
+
+
+def test_split_mp3_leaves_clips_after_the_end_empty():
+    data = b"".join(frame(i) for i in range(2))
+    assert split_mp3(data, [0, 1000]) == [data, b""]
+
+
+def test_batch_chunks_respect_the_ssml_character_limit():
+    texts = ["a" * 1000, "b" * 1000, "c" * 1000, "d"]
+    assert [[t[0] for t in chunk] for chunk in main.polly_batch_chunks(texts)] == [["a", "b"], ["c", "d"]]
+
+
+class FakePolly:
+    """
+    Answers speech marks and audio for an SSML document, one 24 ms frame per 10 characters of text
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def synthesize_speech(self, OutputFormat, Text, **kwargs):
+        self.calls.append(OutputFormat)
+        if kwargs.get("TextType") != "ssml":
+            return {"AudioStream": io.BytesIO(frame(99))}
+        texts = [part.split("/>", 1)[1].split("<", 1)[0] for part in Text.split("<mark name=")[1:]]
+        marks, audio, elapsed = [], b"", 0
+        for i, text in enumerate(texts):
+            marks.append(json.dumps({"type": "ssml", "value": str(i), "time": elapsed}))
+            for _ in range(max(1, len(text) // 10)):
+                audio += frame(i)
+                elapsed += 24
+        if OutputFormat == "json":
+            return {"AudioStream": io.BytesIO("\n".join(marks).encode())}
+        return {"AudioStream": io.BytesIO(audio)}
+
+
+@pytest.fixture
+def polly(tmp_path, monkeypatch):
+    fake = FakePolly()
+    monkeypatch.setattr(main, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(main, "get_polly_client", lambda: fake)
+    return fake
+
+
+def test_batch_synthesis_renders_once_and_caches_each_clip(polly):
+    texts = ["apple", "An apple a day keeps the doctor away.", "I like apples."]
+    clips = main.synthesize_batch_and_cache(texts)
+    assert polly.calls == ["json", "mp3"]
+    assert {text: set(frames_of(clip)) for text, clip in clips.items()} == {
+        texts[0]: {0}, texts[1]: {1}, texts[2]: {2}
+    }
+    for text in texts:
+        assert main.get_audio_cache_path(text).read_bytes() == clips[text]
+
+    # Cached texts are not rendered again
+    assert main.synthesize_batch_and_cache(texts) == clips
+    assert polly.calls == ["json", "mp3"]
+    assert len(list((main.CACHE_DIR / "locks").iterdir())) <= len(texts)
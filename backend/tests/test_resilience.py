@@ -0,0 +1,127 @@
+import pytest
+from botocore.exceptions import ClientError
+
+import app.resilience as resilience
+from app.resilience import CircuitBreaker, CircuitOpenError, ResilientService, RetryBudget
+
+
+def client_error(code, status=400):
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "Call")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 1
+    assert not breaker.allow_request()
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_breaker_lets_one_probe_through_after_recovery_timeout(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+
+    clock[0] += 9
+    assert not breaker.allow_request()
+
+    clock[0] += 1
+    assert breaker.allow_request()
+    assert breaker.state == "half_open"
+    # Only a single probe while it is in flight
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_breaker_reopens_when_probe_fails(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, recovery_timeout=10)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
+
+    clock[0] += 10
+    assert breaker.allow_request()
+
+
+def test_retry_budget_limits_retries_to_a_fraction_of_calls():
+    budget = RetryBudget(ratio=0.5, max_tokens=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.deposit()
+    assert not budget.try_spend()
+    budget.deposit()
+    assert budget.try_spend()
+
+
+def test_service_retries_transient_errors(clock):
+    service = ResilientService("test", deadline=10, max_attempts=3)
+    outcomes = [client_error("ThrottlingException"), client_error("InternalFailure", 500), "ok"]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert service.call(call) == "ok"
+    assert service.stats["retries"] == 2
+    assert service.breaker.state == "closed"
+
+
+def test_service_does_not_retry_client_errors(clock):
+    service = ResilientService("test", deadline=10, failure_threshold=1)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise client_error("ValidationException")
+
+    with pytest.raises(ClientError):
+        service.call(call)
+    assert len(calls) == 1
+    # A bad request does not count against the service's health
+    assert service.breaker.state == "closed"
+
+
+def test_service_gives_up_after_max_attempts_and_short_circuits(clock):
+    service = ResilientService("test", deadline=10, max_attempts=2, failure_threshold=2)
+
+    def call():
+        raise client_error("ServiceUnavailableException", 503)
+
+    with pytest.raises(ClientError):
+        service.call(call)
+    assert service.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        service.call(call)
+    assert service.stats["short_circuited"] == 1
@@ -0,0 +1,185 @@
+import threading
+
+import app.search as search
+from app.search import SearchIndexRegistry, WordSearchIndex, edit_distance
+
+
+def record(word_id, word, meaning=""):
+    return {"wordId": word_id, "word": word, "phonetic": "", "meaning": meaning}
+
+
+def build(*records):
+    index = WordSearchIndex()
+    for r in records:
+        index.add(r)
+    return index
+
+
+def ids(results):
+    return [r["wordId"] for r in results]
+
+
+def test_edit_distance_gives_up_past_the_maximum():
+    assert edit_distance("apple", "apple", 2) == 0
+    assert edit_distance("apple", "aple", 2) == 1
+    assert edit_distance("apple", "orange", 2) == 3
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_prefix_matches_in_key_order_up_to_the_limit():
+    index = build(
+        record("1", "apply"), record("2", "Apple"), record("3", "banana"),
+        record("4", "app"), record("5", "applause"),
+    )
+    results = index.search("APP", limit=3)
+    assert ids(results) == ["4", "5", "2"]
+    assert {r["matchType"] for r in results} == {"prefix"}
+    assert ids(index.search("ban")) == ["3"]
+
+
+def test_prefix_at_the_end_of_the_keys():
+    index = build(*(record(str(i), f"word{i:03d}") for i in range(100)))
+    assert ids(index.search("word09", limit=10)) == [str(i) for i in range(90, 100)]
+    assert index.search("zzz") == []
+
+
+def test_fuzzy_matches_typos_after_prefix_matches():
+    index = build(record("1", "receive"), record("2", "banana"))
+    results = index.search("recieve")
+    assert ids(results) == ["1"]
+    assert results[0]["matchType"] == "fuzzy"
+    assert results[0]["distance"] == 2
+
+    # Prefix matches first, then typo matches that are not prefix matches
+    index = build(record("1", "recipe"), record("2", "recipes"), record("3", "recite"))
+    results = index.search("recipe")
+    assert [(r["wordId"], r["matchType"]) for r in results] == [("1", "prefix"), ("2", "prefix"), ("3", "fuzzy")]
+
+
+def test_short_queries_allow_a_single_typo():
+    index = build(record("1", "tree"), record("2", "dog"))
+    assert ids(index.search("trea")) == ["1"]
+    assert index.search("traa") == []
+
+
+def test_meaning_search_matches_chinese_substrings_shortest_first():
+    index = build(
+        record("1", "apple", "苹果；苹果树"),
+        record("2", "pineapple", "菠萝"),
+        record("3", "apple juice", "苹果汁"),
+        record("4", "fruit", "水果"),
+    )
+    results = index.search("苹果")
+    assert ids(results) == ["3", "1"]
+    assert {r["matchType"] for r in results} == {"meaning"}
+    # Shared bigrams alone are not enough; the whole query must occur
+    assert index.search("果苹") == []
+
+
+def test_meaning_search_matches_single_characters():
+    index = build(record("1", "apple", "苹果"), record("2", "pear", "梨"), record("3", "fruit", "水果"))
+    assert ids(index.search("梨")) == ["2"]
+    assert sorted(ids(index.search("果"))) == ["1", "3"]
+
+
+def test_adding_a_record_twice_keeps_one_entry():
+    index = build(record("1", "apple"), record("1", "apple"), {"word": "no id"})
+    assert ids(index.search("a")) == ["1"]
+    assert len(index.records) == 1
+
+
+class Loader:
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def __call__(self, user_id):
+        self.calls.append(user_id)
+        return list(self.records.get(user_id, []))
+
+
+def test_registry_builds_once_and_keeps_the_index_up_to_date():
+    loader = Loader({"u": [record("1", "apple")]})
+    registry = SearchIndexRegistry(loader)
+    assert ids(registry.get("u").search("app")) == ["1"]
+
+    registry.add_record("u", record("2", "apply"))
+    # Records of users without an index are left for their first build
+    registry.add_record("v", record("3", "apricot"))
+    assert ids(registry.get("u").search("app")) == ["1", "2"]
+    assert loader.calls == ["u"]
+
+
+def test_registry_rebuilds_expired_indexes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search.time, "monotonic", lambda: now[0])
+    loader = Loader({"u": [record("1", "apple")]})
+    registry = SearchIndexRegistry(loader, ttl=60)
+    registry.get("u")
+
+    loader.records["u"].append(record("2", "apply"))
+    now[0] += 60
+    assert ids(registry.get("u").search("app")) == ["1"]
+    now[0] += 1
+    assert ids(registry.get("u").search("app")) == ["1", "2"]
+    assert loader.calls == ["u", "u"]
+
+
+def test_registry_evicts_least_recently_used_indexes():
+    loader = Loader({})
+    registry = SearchIndexRegistry(loader, max_users=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    registry.get("a")
+    registry.get("b")
+    assert loader.calls == ["a", "b", "c", "b"]
+
+
+def test_records_saved_during_a_build_are_not_lost():
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader(user_id):
+        started.set()
+        release.wait(5)
+        return [record("1", "apple")]
+
+    registry = SearchIndexRegistry(loader)
+    built = []
+    builder = threading.Thread(target=lambda: built.append(registry.get("u")))
+    builder.start()
+    started.wait(5)
+    registry.add_record("u", record("2", "apply"))
+    release.set()
+    builder.join(5)
+    assert ids(built[0].search("app")) == ["1", "2"]
+
+
+def test_stale_index_is_served_while_it_is_rebuilt(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search.time, "monotonic", lambda: now[0])
+    started = threading.Event()
+    release = threading.Event()
+    builds = []
+
+    def loader(user_id):
+        builds.append(user_id)
+        if len(builds) > 1:
+            started.set()
+            release.wait(5)
+        return [record(str(len(builds)), "apple")]
+
+    registry = SearchIndexRegistry(loader, ttl=60)
+    registry.get("u")
+    now[0] += 61
+
+    rebuilder = threading.Thread(target=registry.get, args=("u",))
+    rebuilder.start()
+    started.wait(5)
+    # Does not wait for the rebuild
+    assert ids(registry.get("u").search("apple")) == ["1"]
+    release.set()
+    rebuilder.join(5)
+    assert ids(registry.get("u").search("apple")) == ["2"]
@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+import app.main as main
+from app.main import (
+    CLAUDE_MAX_OUTPUT_TOKENS,
+    OutputSizeEstimator,
+    assign_results,
+    call_bedrock_claude,
+    parse_words_completion,
+)
+
+
+def word_data(word):
+    return {
+        "word": word,
+        "phonetic": "/x/",
+        "meaning": "含义",
+        "examples": [{"en": f"A **{word}** {{with braces}}.", "zh": "例句"}],
+    }
+
+
+def test_parse_complete_response():
+    completion = json.dumps({"words": [word_data("apple"), word_data("pear")]})
+    assert [w["word"] for w in parse_words_completion(completion)] == ["apple", "pear"]
+
+
+def test_parse_salvages_complete_objects_from_truncated_response():
+    complete = json.dumps({"words": [word_data("apple"), word_data("pear")]})
+    truncated = complete[:-2] + ', {"word": "plum", "phonetic": "/pl'
+    assert [w["word"] for w in parse_words_completion(truncated)] == ["apple", "pear"]
+
+
+def test_parse_salvage_skips_leading_text():
+    completion = 'Here you go:\n{"words": [' + json.dumps(word_data("apple")) + ', {"word": "pe'
+    assert [w["word"] for w in parse_words_completion(completion)] == ["apple"]
+
+
+@pytest.mark.parametrize("completion", ["", "not json", '{"words": [', '{"other": 1}'])
+def test_parse_without_words_returns_nothing(completion):
+    assert parse_words_completion(completion) == []
+
+
+def test_assign_matches_by_name_case_insensitively():
+    assigned = assign_results(["Apple", "pear"], [word_data("pear"), word_data("apple")])
+    assert assigned[0]["word"] == "apple"
+    assert assigned[1]["word"] == "pear"
+
+
+def test_assign_fills_earliest_free_slot_with_unmatched_words():
+    # The model answered "ran" with its lemma
+    assigned = assign_results(["apple", "ran", "pear"], [word_data("apple"), word_data("run")])
+    assert assigned[0]["word"] == "apple"
+    assert assigned[1]["word"] == "run"
+    assert 2 not in assigned
+
+
+def test_assign_handles_repeated_words():
+    assigned = assign_results(["go", "go"], [word_data("go"), word_data("go")])
+    assert sorted(assigned) == [0, 1]
+
+
+def test_estimator_sizes_batches_to_the_output_budget():
+    estimator = OutputSizeEstimator(200)
+    assert 1 <= estimator.batch_size() <= CLAUDE_MAX_OUTPUT_TOKENS // 200
+    assert estimator.max_tokens_for(1000) == CLAUDE_MAX_OUTPUT_TOKENS
+    assert estimator.max_tokens_for(1) < estimator.max_tokens_for(2)
+
+
+def test_estimator_tracks_observed_usage():
+    estimator = OutputSizeEstimator(200)
+    batch_size = estimator.batch_size()
+    for _ in range(20):
+        estimator.observe(output_tokens=400 * 5, word_count=5)
+    assert estimator.tokens_per_word > 350
+    assert estimator.batch_size() < batch_size
+
+    estimator.observe(output_tokens=0, word_count=5)
+    estimator.observe(output_tokens=100, word_count=0)
+    assert estimator.tokens_per_word > 350
+
+
+class FakeClaude:
+    """
+    Stands in for invoke_claude, answering each batch with a scripted response
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.batches = []
+
+    def __call__(self, bedrock_runtime, words, max_tokens):
+        self.batches.append(list(words))
+        returned, stop_reason = self.responses.pop(0)(words)
+        return {"words": [word_data(w) for w in returned], "stop_reason": stop_reason, "output_tokens": 100}
+
+
+@pytest.fixture
+def fake_claude(monkeypatch):
+    def install(*responses, tokens_per_word=200):
+        fake = FakeClaude(responses)
+        monkeypatch.setattr(main, "invoke_claude", fake)
+        monkeypatch.setattr(main, "get_bedrock_client", lambda: None)
+        monkeypatch.setattr(main, "output_size_estimator", OutputSizeEstimator(tokens_per_word))
+        return fake
+    return install
+
+
+def test_omitted_words_are_requested_again(fake_claude):
+    fake = fake_claude(
+        lambda words: ([w for w in words if w != "b"], "end_turn"),
+        lambda words: (words, "end_turn"),
+    )
+    result = call_bedrock_claude(["a", "b", "c"])
+    assert [w["word"] for w in result["words"]] == ["a", "b", "c"]
+    assert fake.batches == [["a", "b", "c"], ["b"]]
+
+
+def test_words_omitted_twice_fall_back_to_mock_data(fake_claude):
+    omit_b = lambda words: ([w for w in words if w != "b"], "end_turn")
+    # Large words, so batches hold two words each
+    fake = fake_claude(omit_b, omit_b, omit_b, tokens_per_word=1500)
+    result = call_bedrock_claude(["a", "b", "c", "d"])
+    assert [w["word"] for w in result["words"]] == ["a", "b", "c", "d"]
+    assert result["words"][1]["meaning"] == "b的中文含义"
+    assert fake.batches == [["a", "b"], ["b", "c"], ["d"]]
+
+
+def test_truncated_batch_requests_only_missing_words(fake_claude):
+    fake = fake_claude(
+        lambda words: (words[:2], "max_tokens"),
+        lambda words: (words, "end_turn"),
+    )
+    result = call_bedrock_claude(["a", "b", "c", "d"])
+    assert [w["word"] for w in result["words"]] == ["a", "b", "c", "d"]
+    assert fake.batches == [["a", "b", "c", "d"], ["c", "d"]]
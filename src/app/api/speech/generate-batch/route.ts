@@ -0,0 +1,55 @@
+import { NextResponse } from 'next/server';
+import axios from 'axios';
+
+// This API route calls the backend service to generate speech for several texts
+// (e.g. a word and its example sentences) with a single Amazon Polly rendering
+export async function POST(request: Request) {
+  try {
+    const { texts, userId } = await request.json();
+
+    if (!texts || !Array.isArray(texts) || texts.length === 0) {
+      return NextResponse.json(
+        { error: 'Invalid input. Please provide an array of texts to synthesize.' },
+        { status: 400 }
+      );
+    }
+
+    // Call the backend API to generate speech for all texts at once
+    const backendUrl = process.env.BACKEND_API_URL || 'http://localhost:8000';
+
+    // Forward the user id, so the backend rate-limits each user rather than this server.
+    // The backend only trusts it together with the shared proxy secret.
+    const headers: Record<string, string> = {};
+    if (userId && process.env.BACKEND_PROXY_SECRET) {
+      headers['X-User-Id'] = userId;
+      headers['X-Proxy-Secret'] = process.env.BACKEND_PROXY_SECRET;
+    }
+    const response = await axios.post(
+      `${backendUrl}/generate-speech-batch`,
+      { texts, userId },
+      { headers }
+    );
+
+    return NextResponse.json(response.data);
+  } catch (error) {
+    console.error('Error generating batch speech:', error);
+
+    // Pass rate limiting through to the browser together with Retry-After
+    if (axios.isAxiosError(error) && error.response?.status === 429) {
+      return NextResponse.json(
+        { error: error.response.data?.detail || 'Too many requests' },
+        { status: 429, headers: { 'Retry-After': String(error.response.headers['retry-after'] || '1') } }
+      );
+    }
+
+    // Return a more detailed error message in development
+    const errorMessage = error instanceof Error
+      ? error.message
+      : 'Failed to generate speech';
+
+    return NextResponse.json(
+      { error: errorMessage },
+      { status: 500 }
+    );
+  }
+}
@@ -9,7 +9,7 @@ export async function POST(request: Request) {
     const body = await request.json();
     console.log('Request body:', body);
     
-    const { text } = body;
+    const { text, userId } = body;
     
     if (!text || typeof text !== 'string' || text.trim() === '') {
       console.error('Invalid input: text is missing or empty');
@@ -26,7 +26,18 @@ export async function POST(request: Request) {
     const backendUrl = process.env.BACKEND_API_URL || 'http://localhost:8000';
     console.log(`Calling backend API at: ${backendUrl}/generate-speech`);
     
-    const response = await axios.post(`${backendUrl}/generate-speech`, { text });
+    // Forward the user id, so the backend rate-limits each user rather than this server.
+    // The backend only trusts it together with the shared proxy secret.
+    const headers: Record<string, string> = {};
+    if (userId && process.env.BACKEND_PROXY_SECRET) {
+      headers['X-User-Id'] = userId;
+      headers['X-Proxy-Secret'] = process.env.BACKEND_PROXY_SECRET;
+    }
+    const response = await axios.post(
+      `${backendUrl}/generate-speech`,
+      { text, userId },
+      { headers }
+    );
     console.log('Backend API response status:', response.status);
     console.log('Backend API response has audio:', !!response.data.audio);
     
@@ -38,6 +49,14 @@ export async function POST(request: Request) {
   } catch (error) {
     console.error('Error generating speech:', error);
     
+    // Pass rate limiting through to the browser together with Retry-After
+    if (axios.isAxiosError(error) && error.response?.status === 429) {
+      return NextResponse.json(
+        { error: error.response.data?.detail || 'Too many requests' },
+        { status: 429, headers: { 'Retry-After': String(error.response.headers['retry-after'] || '1') } }
+      );
+    }
+    
     // Return a more detailed error message in development
     const errorMessage = error instanceof Error 
       ? error.message 
@@ -1,5 +1,42 @@
 import { NextResponse } from 'next/server';
-import axios from 'axios';
+import axios, { AxiosResponse } from 'axios';
+
+// Conditional request headers forwarded to the backend, and the validators passed back
+const CONDITIONAL_HEADERS = ['if-none-match', 'if-modified-since'];
+const VALIDATOR_HEADERS = ['etag', 'last-modified', 'cache-control'];
+
+// Call a word list endpoint, letting the browser revalidate its cached copy
+async function getWithRevalidation(url: string, request: Request) {
+  const headers: Record<string, string> = {};
+  for (const name of CONDITIONAL_HEADERS) {
+    const value = request.headers.get(name);
+    if (value) {
+      headers[name] = value;
+    }
+  }
+  
+  // axios treats 304 as an error by default
+  return axios.get(url, {
+    headers,
+    validateStatus: status => (status >= 200 && status < 300) || status === 304
+  });
+}
+
+// Relay the backend response, including 304 Not Modified and its validators
+function relay(response: AxiosResponse) {
+  const headers = new Headers();
+  for (const name of VALIDATOR_HEADERS) {
+    const value = response.headers[name];
+    if (value) {
+      headers.set(name, String(value));
+    }
+  }
+  
+  if (response.status === 304) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+  return NextResponse.json(response.data, { headers });
+}
 
 // This API route calls the backend service to get word lists from DynamoDB
 export async function GET(request: Request) {
@@ -17,9 +54,9 @@ export async function GET(request: Request) {
     
     // Call the backend API to get the word lists from DynamoDB
     const backendUrl = process.env.BACKEND_API_URL || 'http://localhost:8000';
-    const response = await axios.get(`${backendUrl}/get-wordlists?userId=${userId}`);
+    const response = await getWithRevalidation(`${backendUrl}/get-wordlists?userId=${userId}`, request);
     
-    return NextResponse.json(response.data);
+    return relay(response);
   } catch (error) {
     console.error('Error getting word lists:', error);
     
@@ -49,9 +86,9 @@ export async function POST(request: Request) {
     
     // Call the backend API to get the specific word list from DynamoDB
     const backendUrl = process.env.BACKEND_API_URL || 'http://localhost:8000';
-    const response = await axios.get(`${backendUrl}/get-wordlist/${listId}`);
+    const response = await getWithRevalidation(`${backendUrl}/get-wordlist/${listId}`, request);
     
-    return NextResponse.json(response.data);
+    return relay(response);
   } catch (error) {
     console.error('Error getting word list:', error);
     
@@ -4,7 +4,7 @@ import axios from 'axios';
 // This API route calls the backend service to process words
 export async function POST(request: Request) {
   try {
-    const { words } = await request.json();
+    const { words, userId } = await request.json();
     
     if (!words || !Array.isArray(words) || words.length === 0) {
       return NextResponse.json(
@@ -16,12 +16,31 @@ export async function POST(request: Request) {
     // Call the backend API to process the words
     // The backend will use Amazon Bedrock Claude to generate the word data
     const backendUrl = process.env.BACKEND_API_URL || 'http://localhost:8000';
-    const response = await axios.post(`${backendUrl}/process-words`, { words });
+    // Forward the user id, so the backend rate-limits each user rather than this server.
+    // The backend only trusts it together with the shared proxy secret.
+    const headers: Record<string, string> = {};
+    if (userId && process.env.BACKEND_PROXY_SECRET) {
+      headers['X-User-Id'] = userId;
+      headers['X-Proxy-Secret'] = process.env.BACKEND_PROXY_SECRET;
+    }
+    const response = await axios.post(
+      `${backendUrl}/process-words`,
+      { words, userId },
+      { headers }
+    );
     
     return NextResponse.json(response.data);
   } catch (error) {
     console.error('Error processing words:', error);
     
+    // Pass rate limiting through to the browser together with Retry-After
+    if (axios.isAxiosError(error) && error.response?.status === 429) {
+      return NextResponse.json(
+        { error: error.response.data?.detail || 'Too many requests' },
+        { status: 429, headers: { 'Retry-After': String(error.response.headers['retry-after'] || '1') } }
+      );
+    }
+    
     // Return a more detailed error message in development
     const errorMessage = error instanceof Error 
       ? error.message 
@@ -94,7 +94,7 @@ export default function HistoryPage() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ text }),
+        body: JSON.stringify({ text, userId }),
       });
       
       const data = await response.json();
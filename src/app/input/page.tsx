@@ -37,7 +37,7 @@ export default function InputPage() {
     
     try {
       // Send the words to the API
-      const response = await axios.post('/api/words/process', { words })
+      const response = await axios.post('/api/words/process', { words, userId })
       
       // Store the processed words in localStorage for now
       // In a real app, we might use a more robust state management solution
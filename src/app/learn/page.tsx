@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useRouter } from 'next/navigation'
 import axios from 'axios'
 
@@ -53,6 +53,8 @@ export default function LearnPage() {
   const [savingWord, setSavingWord] = useState(false)
   const [saveSuccess, setSaveSuccess] = useState<string | null>(null)
   const [saveError, setSaveError] = useState<string | null>(null)
+  // Audio clips (base64 MP3) prefetched per text, so playback needs no extra request
+  const audioClips = useRef<Record<string, string>>({})
   const router = useRouter()
   
   // Default user ID (in a real app, this would come from authentication)
@@ -143,6 +145,34 @@ export default function LearnPage() {
     }
   }, [words, currentIndex]);
   
+  // Prefetch the audio for the current word and its examples with one batch request
+  useEffect(() => {
+    const currentWord = words[currentIndex]
+    if (!currentWord) {
+      return
+    }
+    
+    const texts = [currentWord.word, ...currentWord.examples.map(example => example.en.replace(/\*\*/g, ''))]
+      .filter(text => text.trim() !== '' && !audioClips.current[text])
+    if (texts.length === 0) {
+      return
+    }
+    
+    const prefetchAudio = async () => {
+      try {
+        const response = await axios.post('/api/speech/generate-batch', { texts, userId })
+        for (const clip of response.data.clips || []) {
+          audioClips.current[clip.text] = clip.audio
+        }
+      } catch (error) {
+        // Playback falls back to one request per text
+        console.error('Error prefetching audio:', error)
+      }
+    }
+    
+    prefetchAudio()
+  }, [words, currentIndex, userId])
+  
   // Function to save a word to the learning records
   const saveWordToLearningRecords = async (word: string, addToReviewList: boolean) => {
     setSavingWord(true);
@@ -151,7 +181,7 @@ export default function LearnPage() {
     
     try {
       // Call Claude to get details for the word
-      const response = await axios.post('/api/words/process', { words: [word] });
+      const response = await axios.post('/api/words/process', { words: [word], userId });
       const processedWord = response.data.words[0];
       
       // Save the word to learning records
@@ -172,6 +202,16 @@ export default function LearnPage() {
 
   const playAudio = async (text: string) => {
     console.log(`Attempting to play audio for text: "${text}"`);
+    
+    // Use the clip prefetched for the current card, if it has arrived
+    const prefetched = audioClips.current[text];
+    if (prefetched) {
+      new Audio(`data:audio/mp3;base64,${prefetched}`).play().catch(err => {
+        console.error('Audio play() promise rejected:', err);
+      });
+      return;
+    }
+    
     try {
       // Call our API route that uses Amazon Polly
       console.log('Sending request to /api/speech/generate');
@@ -180,7 +220,7 @@ export default function LearnPage() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ text }),
+        body: JSON.stringify({ text, userId }),
       });
       
       console.log('Response status:', response.status);
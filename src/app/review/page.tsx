@@ -98,7 +98,7 @@ export default function ReviewPage() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ text }),
+        body: JSON.stringify({ text, userId }),
       });
       
       const data = await response.json();